@@ -7,13 +7,141 @@ ETL数据处理器 - 替代TypeScript的数据转换逻辑
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 import logging
+from dataclasses import dataclass
 from datetime import datetime
+from types import MappingProxyType
+from pandas.api.types import CategoricalDtype
 
 from .unified_model import UnifiedHazardModel
 from .quality_monitor import DataQualityMonitor
 
+# 灾害类型的固定分类（编码跨请求稳定，int8存储）
+HAZARD_TYPES = ('EARTHQUAKE', 'VOLCANO', 'STORM', 'FLOOD', 'WILDFIRE')
+HAZARD_TYPE_DTYPE = CategoricalDtype(categories=list(HAZARD_TYPES), ordered=False)
+HAZARD_CODES = MappingProxyType({hazard_type: code for code, hazard_type in enumerate(HAZARD_TYPES)})
+
+# 入库时转为分类编码的低基数字符串列
+_CATEGORICAL_COLUMNS = ('type', 'severity', 'source')
+
+# 各数据源对应的统一模型转换方法（按合并顺序排列）
+_SOURCE_TRANSFORMS = MappingProxyType({
+    'USGS': 'transform_usgs_to_unified',
+    'NASA': 'transform_nasa_to_unified',
+    'GDACS': 'transform_gdacs_to_unified',
+})
+
+def _hazard_type_categorical(types: pd.Series) -> pd.Series:
+    """类型列转为分类编码：已知类型使用固定编码，未知类型追加在已知类型之后，不会被丢弃"""
+    extra = pd.Index(types.dropna().unique()).difference(HAZARD_TYPE_DTYPE.categories)
+    if len(extra) == 0:
+        return types.astype(HAZARD_TYPE_DTYPE)
+    return types.astype(CategoricalDtype(HAZARD_TYPE_DTYPE.categories.append(extra), ordered=False))
+
+def _upper_hazard_type_categorical(types: pd.Series) -> pd.Series:
+    """分类编码的类型列统一转大写，结果与先.str.upper()再_hazard_type_categorical相同
+    
+    只对类别（字典）做字符串运算，再按旧编码映射到新编码，不逐行处理字符串；
+    大小写不同的类别会合并到同一新类别
+    """
+    codes = types.cat.codes.to_numpy()
+    upper = pd.Index(types.cat.categories.str.upper())
+    used = upper[np.unique(codes[codes >= 0])].dropna().unique()
+    extra = pd.Index(used).difference(HAZARD_TYPE_DTYPE.categories)
+    dtype = HAZARD_TYPE_DTYPE if len(extra) == 0 else CategoricalDtype(
+        HAZARD_TYPE_DTYPE.categories.append(extra), ordered=False
+    )
+    # 旧类别 -> 新编码，末尾追加-1供缺失值（编码-1）取用
+    mapping = np.append(dtype.categories.get_indexer(upper), -1)
+    return pd.Series(pd.Categorical.from_codes(mapping[codes], dtype=dtype), index=types.index, name=types.name)
+
+def _coordinate_arrays(coordinates: pd.Series):
+    """一次遍历拆出经度、纬度数组，无效坐标（非列表或长度不足2）记为NaN"""
+    n = len(coordinates)
+    lon = np.full(n, np.nan)
+    lat = np.full(n, np.nan)
+    has_coords = np.zeros(n, dtype=bool)
+    for i, c in enumerate(coordinates.to_numpy()):
+        if isinstance(c, list) and len(c) >= 2:
+            lon[i], lat[i] = c[0], c[1]
+            has_coords[i] = True
+    return lon, lat, has_coords
+
+@dataclass(frozen=True)
+class AnalyticsBundle:
+    """单次请求的共享列数组（结构数组）
+    
+    统计、预测、风险三个分析器在各自线程中读取同一份列数据，
+    时间戳解析、坐标拆分、类型编码只在构建时做一次
+    
+    - magnitude / pop: float64，缺失为NaN
+    - ts_ns: UTC纳秒时间戳（int64，NaT为int64最小值）
+    - days: 本地日历日（datetime64[D]，与.dt.date的分日一致）
+    - lat / lon / has_coords: 坐标数组及有效标记
+    - type_codes / type_categories: 类型的分类编码及对应类别
+    """
+    magnitude: np.ndarray
+    pop: np.ndarray
+    ts_ns: np.ndarray
+    days: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    has_coords: np.ndarray
+    type_codes: np.ndarray
+    type_categories: pd.Index
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "AnalyticsBundle":
+        """从（已完成类型转换的）DataFrame提取共享列数组"""
+        n = len(df)
+        
+        def numeric(col: str) -> np.ndarray:
+            if col not in df.columns:
+                return np.full(n, np.nan)
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        if 'timestamp' in df.columns:
+            timestamps = pd.to_datetime(df['timestamp'])
+            ts_ns = timestamps.astype(np.int64).to_numpy()
+            if timestamps.dt.tz is not None:
+                timestamps = timestamps.dt.tz_localize(None)
+            days = timestamps.to_numpy(dtype='datetime64[D]')
+        else:
+            ts_ns = np.full(n, np.iinfo(np.int64).min)
+            days = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+        
+        if 'coordinates' in df.columns:
+            lon, lat, has_coords = _coordinate_arrays(df['coordinates'])
+        else:
+            lon, lat, has_coords = np.full(n, np.nan), np.full(n, np.nan), np.zeros(n, dtype=bool)
+        
+        if 'type' not in df.columns:
+            types = pd.Series([None] * n, dtype=HAZARD_TYPE_DTYPE)
+        elif isinstance(df['type'].dtype, CategoricalDtype):
+            types = df['type']
+        else:
+            types = _hazard_type_categorical(df['type'])
+        
+        return cls(
+            magnitude=numeric('magnitude'),
+            pop=numeric('populationExposed'),
+            ts_ns=ts_ns,
+            days=days,
+            lat=lat,
+            lon=lon,
+            has_coords=has_coords,
+            type_codes=types.cat.codes.to_numpy(),
+            type_categories=types.cat.categories
+        )
+    
+    def type_mask(self, *hazard_types: str) -> np.ndarray:
+        """给定类型的行掩码（整数编码比较，不做字符串比较）"""
+        codes = [self.type_categories.get_loc(t) for t in hazard_types if t in self.type_categories]
+        if len(codes) == 1:
+            return self.type_codes == codes[0]
+        return np.isin(self.type_codes, codes)
+
 class ETLProcessor:
     """ETL数据流水线处理器 - 集成统一模型和质量监控"""
     
@@ -22,13 +150,17 @@ class ETLProcessor:
         self.unified_model = UnifiedHazardModel()
         self.quality_monitor = DataQualityMonitor()
         
-    def convert_to_dataframe(self, hazards: List[Dict]) -> pd.DataFrame:
-        """将JSON数据转换为Pandas DataFrame"""
+    def convert_to_dataframe(self, hazards: List[Dict], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """将JSON数据转换为Pandas DataFrame
+        
+        已知字段列表时传入columns，按固定列构建，省去逐条合并字段名；
+        type/severity/source转为分类编码（int8），比较和分组不再逐个比较字符串
+        """
         try:
             if not hazards:
                 return pd.DataFrame()
             
-            df = pd.DataFrame(hazards)
+            df = pd.DataFrame.from_records(hazards, columns=columns) if columns else pd.DataFrame(hazards)
             
             # 数据类型转换
             if 'timestamp' in df.columns:
@@ -40,6 +172,10 @@ class ETLProcessor:
             if 'populationExposed' in df.columns:
                 df['populationExposed'] = pd.to_numeric(df['populationExposed'], errors='coerce')
             
+            for col in _CATEGORICAL_COLUMNS:
+                if col in df.columns:
+                    df[col] = _hazard_type_categorical(df[col]) if col == 'type' else df[col].astype('category')
+            
             return df
             
         except Exception as e:
@@ -113,6 +249,42 @@ class ETLProcessor:
             self.logger.error(f"Unified model transformation failed for {source}: {e}")
             raise
     
+    def transform_source(self, data: List[Dict], source: str) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """单个数据源（USGS/NASA/GDACS）转换为统一模型并评估质量
+        
+        各数据源互不依赖，可在不同线程中并发执行
+        """
+        transform = getattr(self.unified_model, _SOURCE_TRANSFORMS[source])
+        df = transform(data)
+        return df, self.quality_monitor.assess_quality(df, source)
+    
+    def merge_transformed_sources(self, transformed: Dict[str, Tuple[pd.DataFrame, Dict[str, Any]]]) -> Dict[str, Any]:
+        """合并已转换的各数据源（键为数据源名，按USGS、NASA、GDACS顺序合并）并评估整体质量"""
+        present = [source for source in _SOURCE_TRANSFORMS if source in transformed]
+        dataframes = [transformed[source][0] for source in present]
+        quality_reports = [transformed[source][1] for source in present]
+        
+        # 合并数据源
+        unified_df = self.unified_model.merge_sources(*dataframes)
+        
+        # 对合并后的数据进行整体质量评估
+        merged_quality = self.quality_monitor.assess_quality(unified_df, 'MERGED')
+        
+        # 比较数据源质量
+        source_comparison = self.quality_monitor.compare_sources(quality_reports)
+        
+        return {
+            'unified_data': unified_df,
+            'total_records': len(unified_df),
+            'source_records': {
+                source: len(transformed[source][0]) if source in transformed else 0
+                for source in _SOURCE_TRANSFORMS
+            },
+            'merged_quality': merged_quality,
+            'source_quality_reports': quality_reports,
+            'source_comparison': source_comparison
+        }
+    
     def merge_multi_source_data(self, 
                                 usgs_data: List[Dict] = None,
                                 nasa_data: List[Dict] = None, 
@@ -128,51 +300,12 @@ class ETLProcessor:
         }
         """
         try:
-            dataframes = []
-            quality_reports = []
-            
-            # 转换USGS数据
-            if usgs_data:
-                usgs_df = self.unified_model.transform_usgs_to_unified(usgs_data)
-                dataframes.append(usgs_df)
-                usgs_quality = self.quality_monitor.assess_quality(usgs_df, 'USGS')
-                quality_reports.append(usgs_quality)
-            
-            # 转换NASA数据
-            if nasa_data:
-                nasa_df = self.unified_model.transform_nasa_to_unified(nasa_data)
-                dataframes.append(nasa_df)
-                nasa_quality = self.quality_monitor.assess_quality(nasa_df, 'NASA')
-                quality_reports.append(nasa_quality)
-            
-            # 转换GDACS数据
-            if gdacs_data:
-                gdacs_df = self.unified_model.transform_gdacs_to_unified(gdacs_data)
-                dataframes.append(gdacs_df)
-                gdacs_quality = self.quality_monitor.assess_quality(gdacs_df, 'GDACS')
-                quality_reports.append(gdacs_quality)
-            
-            # 合并数据源
-            unified_df = self.unified_model.merge_sources(*dataframes)
-            
-            # 对合并后的数据进行整体质量评估
-            merged_quality = self.quality_monitor.assess_quality(unified_df, 'MERGED')
-            
-            # 比较数据源质量
-            source_comparison = self.quality_monitor.compare_sources(quality_reports)
-            
-            return {
-                'unified_data': unified_df,
-                'total_records': len(unified_df),
-                'source_records': {
-                    'USGS': len(dataframes[0]) if usgs_data and len(dataframes) > 0 else 0,
-                    'NASA': len(dataframes[1]) if nasa_data and len(dataframes) > 1 else 0,
-                    'GDACS': len(dataframes[2]) if gdacs_data and len(dataframes) > 2 else 0
-                },
-                'merged_quality': merged_quality,
-                'source_quality_reports': quality_reports,
-                'source_comparison': source_comparison
+            sources = {'USGS': usgs_data, 'NASA': nasa_data, 'GDACS': gdacs_data}
+            transformed = {
+                source: self.transform_source(data, source)
+                for source, data in sources.items() if data
             }
+            return self.merge_transformed_sources(transformed)
             
         except Exception as e:
             self.logger.error(f"Multi-source merge failed: {e}")
@@ -189,7 +322,10 @@ class ETLProcessor:
         
         # severity缺失值用默认值
         if 'severity' in df.columns:
-            df['severity'] = df['severity'].fillna('UNKNOWN')
+            severity = df['severity']
+            if isinstance(severity.dtype, CategoricalDtype) and 'UNKNOWN' not in severity.cat.categories:
+                severity = severity.cat.add_categories('UNKNOWN')
+            df['severity'] = severity.fillna('UNKNOWN')
         
         return df
     
@@ -223,8 +359,12 @@ class ETLProcessor:
         }
         
         if 'type' in df.columns:
-            df['type'] = df['type'].str.upper()
-            df['type'] = df['type'].replace(type_mapping)
+            if isinstance(df['type'].dtype, CategoricalDtype):
+                # 分类列只需转换类别本身，并重新编码以保持固定分类编码
+                df['type'] = _upper_hazard_type_categorical(df['type'])
+            else:
+                df['type'] = df['type'].str.upper()
+                df['type'] = df['type'].replace(type_mapping)
         
         return df
     
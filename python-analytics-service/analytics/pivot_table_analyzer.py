@@ -19,6 +19,98 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _group_codes(df: pd.DataFrame, columns: List[str]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """多列组合的分组编码
+    
+    各列按首次出现顺序编码（与.unique()顺序一致），组合编码按列的字典序排列，
+    即与逐列嵌套遍历unique()的顺序相同；任一列缺失的行编码为-1
+    """
+    codes = np.zeros(len(df), dtype=np.int64)
+    valid = np.ones(len(df), dtype=bool)
+    uniques = []
+    for col in columns:
+        col_codes, col_uniques = pd.factorize(df[col])
+        valid &= col_codes >= 0
+        codes = codes * len(col_uniques) + col_codes
+        uniques.append(np.asarray(col_uniques, dtype=object))
+    return np.where(valid, codes, -1), uniques
+
+def _year_month_labels(timestamps: pd.Series) -> np.ndarray:
+    """时间戳的'YYYY-MM'标签（与.dt.to_period('M').astype(str)相同，缺失为'NaT'）
+    
+    按本地时间截断到月后只对不同的月份格式化字符串，再按索引展开
+    """
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    months = timestamps.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]')
+    unique_months, inverse = np.unique(months, return_inverse=True)
+    return np.datetime_as_string(unique_months, unit='M').astype(object)[inverse]
+
+def _sorted_categorical(categories: np.ndarray, codes: np.ndarray) -> pd.Categorical:
+    """由类别数组及编码构建分类列，类别按字典序排列（编码-1为缺失）
+    
+    类别有序时分组、透视的排列顺序与object字符串列相同
+    """
+    categories = np.asarray(categories, dtype=object)
+    order = np.argsort(categories, kind='stable')
+    # 原编码 -> 排序后编码，末尾追加-1供缺失值（编码-1）取用
+    rank = np.full(len(order) + 1, -1, dtype=np.int64)
+    rank[order] = np.arange(len(order))
+    return pd.Categorical.from_codes(rank[codes], categories=categories[order])
+
+def _string_categorical(values: pd.Series, upper: bool = False) -> pd.Categorical:
+    """字符串列转为分类编码，可选统一大写（非字符串值视为缺失，与.str.upper()相同）
+    
+    只对去重后的取值做字符串运算，再按编码展开，不逐行处理字符串
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(np.asarray(uniques, dtype=object))
+    if upper:
+        uniques = uniques.str.upper()
+    # 大写后相同的取值合并为同一类别；末尾追加-1供缺失值取用
+    merged_codes, merged = pd.factorize(uniques)
+    return _sorted_categorical(merged, np.append(merged_codes, -1)[codes])
+
+def _classify_by_bounds(lat: np.ndarray, lng: np.ndarray,
+                        bounds: Tuple[Tuple[str, float, float, float, float], ...], default: str) -> pd.Categorical:
+    """按经纬度范围（依次匹配，首个命中的生效）向量化分类，结果为只含实际出现类别的分类列"""
+    labels = np.array([label for label, *_ in bounds] + [default], dtype=object)
+    conditions = [
+        (lat >= lat_min) & (lat <= lat_max) & (lng >= lng_min) & (lng <= lng_max)
+        for _, lat_min, lat_max, lng_min, lng_max in bounds
+    ]
+    codes = np.select(conditions, np.arange(len(bounds)), default=len(bounds))
+    used, codes = np.unique(codes, return_inverse=True)
+    return _sorted_categorical(labels[used], codes.ravel())
+
+# 地理区域范围：(区域, 纬度下限, 纬度上限, 经度下限, 经度上限)，按顺序匹配
+_REGION_BOUNDS = (
+    ('Asia-Pacific', -10, 60, 60, 180),     # 亚太地区
+    ('North America', 15, 75, -170, -50),   # 北美地区
+    ('Europe', 35, 70, -10, 60),            # 欧洲地区
+    ('South America', -60, 15, -85, -30),   # 南美地区
+    ('Africa', -35, 40, -20, 55),           # 非洲地区
+)
+
+# 大洲范围，按顺序匹配
+_CONTINENT_BOUNDS = (
+    ('Asia', -10, 80, 25, 180),
+    ('North America', 15, 75, -170, -50),
+    ('Europe', 35, 70, -10, 60),
+    ('South America', -60, 15, -85, -30),
+    ('Africa', -35, 40, -20, 55),
+    ('Oceania', -50, -10, 110, 180),
+)
+
+def _unravel_group(code: int, uniques: List[np.ndarray]) -> Tuple:
+    """组合编码还原为各列取值"""
+    values = []
+    for col_uniques in reversed(uniques):
+        code, idx = divmod(code, len(col_uniques))
+        values.append(col_uniques[idx])
+    return tuple(reversed(values))
+
+
 class FourDimensionalPivotTable:
     """4维数据透视表分析引擎
     
@@ -44,6 +136,8 @@ class FourDimensionalPivotTable:
         """
         self.df = df.copy()
         self._preprocess_data()
+        # 透视表缓存：预处理后self.df不再变化，相同参数的透视表只构建一次
+        self._pivot_cache: Dict[Tuple, pd.DataFrame] = {}
         logger.info(f"4维透视表初始化完成，数据量: {len(self.df)}")
     
     def _preprocess_data(self):
@@ -65,7 +159,7 @@ class FourDimensionalPivotTable:
         self.df['day'] = self.df['timestamp'].dt.day
         self.df['hour'] = self.df['timestamp'].dt.hour
         self.df['date_only'] = self.df['timestamp'].dt.date
-        self.df['year_month'] = self.df['timestamp'].dt.to_period('M').astype(str)
+        self.df['year_month'] = _year_month_labels(self.df['timestamp'])
         
         # 2. 地理维度：经纬度分组，地理区域分类
         if 'coordinates' in self.df.columns:
@@ -83,77 +177,44 @@ class FourDimensionalPivotTable:
             if 'lng' not in self.df.columns:
                 self.df['lng'] = 0
         
-        # 地理区域分类
-        self.df['region'] = self.df.apply(self._classify_region, axis=1)
-        self.df['continent'] = self.df.apply(self._classify_continent, axis=1)
+        # 地理区域分类（按经纬度范围向量化判断，结果为分类编码）
+        lat = self.df['lat'].to_numpy(dtype=np.float64)
+        lng = self.df['lng'].to_numpy(dtype=np.float64)
+        self.df['region'] = _classify_by_bounds(lat, lng, _REGION_BOUNDS, 'Other')
+        self.df['continent'] = _classify_by_bounds(lat, lng, _CONTINENT_BOUNDS, 'Antarctica')
         
         # 经纬度网格分组（10度为一格）
         self.df['lat_bin'] = (self.df['lat'] // 10).astype(int) * 10
         self.df['lng_bin'] = (self.df['lng'] // 10).astype(int) * 10
-        self.df['geo_grid'] = self.df.apply(
-            lambda row: f"({row['lat_bin']},{row['lng_bin']})", axis=1
+        # 只对不同的网格格式化标签
+        grids, grid_codes = np.unique(
+            np.column_stack([self.df['lat_bin'].to_numpy(), self.df['lng_bin'].to_numpy()]),
+            axis=0, return_inverse=True
+        )
+        self.df['geo_grid'] = _sorted_categorical(
+            [f"({lat_bin},{lng_bin})" for lat_bin, lng_bin in grids.tolist()], grid_codes.ravel()
         )
         
-        # 3. 类型维度：标准化灾害类型
+        # 3. 类型维度：标准化灾害类型（分类编码）
         if 'type' in self.df.columns:
-            self.df['type_category'] = self.df['type'].str.upper()
+            self.df['type_category'] = _string_categorical(self.df['type'], upper=True)
         else:
             self.df['type_category'] = 'UNKNOWN'
         
-        # 4. 严重性维度：三级分类和数值化
+        # 4. 严重性维度：三级分类和数值化（先按原始取值数值化，再转为分类编码）
         if 'severity' in self.df.columns:
             self.df['severity_level'] = self.df['severity'].map({
                 'WARNING': 3,
                 'WATCH': 2,
                 'ADVISORY': 1
             }).fillna(0)
+            self.df['severity'] = _string_categorical(self.df['severity'])
         else:
             self.df['severity'] = 'UNKNOWN'
             self.df['severity_level'] = 0
         
         logger.info("数据预处理完成")
     
-    def _classify_region(self, row) -> str:
-        """地理区域分类算法"""
-        lat, lng = row.get('lat', 0), row.get('lng', 0)
-        
-        # 亚太地区
-        if -10 <= lat <= 60 and 60 <= lng <= 180:
-            return 'Asia-Pacific'
-        # 北美地区
-        elif 15 <= lat <= 75 and -170 <= lng <= -50:
-            return 'North America'
-        # 欧洲地区
-        elif 35 <= lat <= 70 and -10 <= lng <= 60:
-            return 'Europe'
-        # 南美地区
-        elif -60 <= lat <= 15 and -85 <= lng <= -30:
-            return 'South America'
-        # 非洲地区
-        elif -35 <= lat <= 40 and -20 <= lng <= 55:
-            return 'Africa'
-        else:
-            return 'Other'
-    
-    def _classify_continent(self, row) -> str:
-        """大洲分类"""
-        lat, lng = row.get('lat', 0), row.get('lng', 0)
-        
-        if -10 <= lat <= 80 and 25 <= lng <= 180:
-            return 'Asia'
-        elif 15 <= lat <= 75 and -170 <= lng <= -50:
-            return 'North America'
-        elif 35 <= lat <= 70 and -10 <= lng <= 60:
-            return 'Europe'
-        elif -60 <= lat <= 15 and -85 <= lng <= -30:
-            return 'South America'
-        elif -35 <= lat <= 40 and -20 <= lng <= 55:
-            return 'Africa'
-        elif -50 <= lat <= -10 and 110 <= lng <= 180:
-            return 'Oceania'
-        else:
-            return 'Antarctica'
-    
     def create_4d_pivot(self, 
                         time_dim: str = 'month',
                         geo_dim: str = 'region', 
@@ -172,8 +233,13 @@ class FourDimensionalPivotTable:
             values_col: 聚合的值列
         
         Returns:
-            4维透视表 (MultiIndex DataFrame)
+            4维透视表 (MultiIndex DataFrame)，同参数重复调用返回缓存的同一对象，调用方不应原地修改
         """
+        cache_key = (time_dim, geo_dim, type_dim, severity_dim, aggfunc, values_col)
+        cached = self._pivot_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # 确保values_col存在
             if values_col not in self.df.columns:
@@ -185,10 +251,12 @@ class FourDimensionalPivotTable:
                 index=[time_dim, geo_dim],  # 行索引：时间×地理
                 columns=[type_dim, severity_dim],  # 列索引：类型×严重性
                 aggfunc=aggfunc,
-                fill_value=0
+                fill_value=0,
+                observed=True  # 分类维度只保留实际出现的组合
             )
             
             logger.info(f"4维透视表构建成功，维度: {pivot_4d.shape}")
+            self._pivot_cache[cache_key] = pivot_4d
             return pivot_4d
         except Exception as e:
             logger.error(f"构建透视表失败: {str(e)}")
@@ -299,41 +367,41 @@ class FourDimensionalPivotTable:
             logger.warning("时间窗口内没有数据")
             return pd.DataFrame()
         
-        # 按日期分组，计算每个维度组合的趋势
-        for region in df_recent['region'].unique():
-            for hazard_type in df_recent['type_category'].unique():
-                for severity in df_recent['severity'].unique():
-                    key = f"{region}_{hazard_type}_{severity}"
-                    
-                    subset = df_recent[
-                        (df_recent['region'] == region) &
-                        (df_recent['type_category'] == hazard_type) &
-                        (df_recent['severity'] == severity)
-                    ]
+        # 一次编码出(区域, 类型, 严重性, 日期)组合并计数，不再逐组合过滤全表
+        group_codes, uniques = _group_codes(df_recent, ['region', 'type_category', 'severity'])
+        day_codes, _ = pd.factorize(df_recent['date_only'], sort=True)
+        valid = group_codes >= 0
+        n_days = int(day_codes.max()) + 1
+        cells, daily = np.unique(group_codes[valid] * n_days + day_codes[valid], return_counts=True)
+        cell_groups = cells // n_days
+        # 各组合在cells中的区间（cells有序，同组合的日期按时间升序相邻）
+        group_ids, starts = np.unique(cell_groups, return_index=True)
+        ends = np.append(starts[1:], len(cells))
+        
+        # 按组合计算趋势（线性回归斜率）
+        for group, start, stop in zip(group_ids.tolist(), starts, ends):
+            region, hazard_type, severity = _unravel_group(group, uniques)
+            key = f"{region}_{hazard_type}_{severity}"
+            daily_counts = daily[start:stop]
+            
+            if len(daily_counts) >= 3:
+                try:
+                    x = np.arange(len(daily_counts))
+                    slope, intercept, r_value, p_value, std_err = linregress(x, daily_counts)
                     
-                    if len(subset) > 0:
-                        daily_counts = subset.groupby('date_only').size()
-                        
-                        # 计算趋势（线性回归斜率）
-                        if len(daily_counts) >= 3:
-                            try:
-                                x = np.arange(len(daily_counts))
-                                y = daily_counts.values
-                                slope, intercept, r_value, p_value, std_err = linregress(x, y)
-                                
-                                results[key] = {
-                                    'region': region,
-                                    'type': hazard_type,
-                                    'severity': severity,
-                                    'total_count': len(subset),
-                                    'daily_average': float(daily_counts.mean()),
-                                    'trend_slope': float(slope),
-                                    'trend_direction': 'increasing' if slope > 0.1 else ('decreasing' if slope < -0.1 else 'stable'),
-                                    'r_squared': float(r_value ** 2),
-                                    'p_value': float(p_value)
-                                }
-                            except Exception as e:
-                                logger.warning(f"趋势计算失败 {key}: {str(e)}")
+                    results[key] = {
+                        'region': region,
+                        'type': hazard_type,
+                        'severity': severity,
+                        'total_count': int(daily_counts.sum()),
+                        'daily_average': float(daily_counts.mean()),
+                        'trend_slope': float(slope),
+                        'trend_direction': 'increasing' if slope > 0.1 else ('decreasing' if slope < -0.1 else 'stable'),
+                        'r_squared': float(r_value ** 2),
+                        'p_value': float(p_value)
+                    }
+                except Exception as e:
+                    logger.warning(f"趋势计算失败 {key}: {str(e)}")
         
         if not results:
             logger.warning("没有足够数据进行趋势分析")
@@ -361,35 +429,43 @@ class FourDimensionalPivotTable:
         
         risk_scores = []
         
-        for region in df_recent['region'].unique():
-            for hazard_type in df_recent['type_category'].unique():
-                subset = df_recent[
-                    (df_recent['region'] == region) &
-                    (df_recent['type_category'] == hazard_type)
-                ]
-                
-                if len(subset) > 0:
-                    # 计算风险分数
-                    frequency_score = len(subset) / time_window  # 日均频率
-                    severity_score = subset['severity_level'].mean()  # 平均严重性
-                    recent_score = len(subset[subset['timestamp'] >= end_date - timedelta(days=1)]) * 2  # 最近1天权重加倍
-                    
-                    total_risk = (
-                        frequency_score * 0.4 +
-                        severity_score * 0.4 +
-                        recent_score * 0.2
-                    )
-                    
-                    risk_scores.append({
-                        'region': region,
-                        'type': hazard_type,
-                        'risk_score': float(total_risk),
-                        'frequency': float(frequency_score),
-                        'severity': float(severity_score),
-                        'recency': float(recent_score),
-                        'total_events': len(subset),
-                        'time_window': time_window
-                    })
+        # 按(区域, 类型)组合一次性汇总事件数、严重性之和与最近1天事件数
+        group_codes, uniques = _group_codes(df_recent, ['region', 'type_category'])
+        valid = group_codes >= 0
+        codes = group_codes[valid]
+        n_groups = len(uniques[0]) * len(uniques[1])
+        counts = np.bincount(codes, minlength=n_groups)
+        severity_sums = np.bincount(
+            codes, weights=df_recent['severity_level'].to_numpy(dtype=np.float64)[valid], minlength=n_groups
+        )
+        is_recent = (df_recent['timestamp'] >= end_date - timedelta(days=1)).to_numpy()[valid]
+        recent_counts = np.bincount(codes[is_recent], minlength=n_groups)
+        
+        for group in np.flatnonzero(counts).tolist():
+            region, hazard_type = _unravel_group(group, uniques)
+            total_events = int(counts[group])
+            
+            # 计算风险分数
+            frequency_score = total_events / time_window  # 日均频率
+            severity_score = severity_sums[group] / total_events  # 平均严重性
+            recent_score = int(recent_counts[group]) * 2  # 最近1天权重加倍
+            
+            total_risk = (
+                frequency_score * 0.4 +
+                severity_score * 0.4 +
+                recent_score * 0.2
+            )
+            
+            risk_scores.append({
+                'region': region,
+                'type': hazard_type,
+                'risk_score': float(total_risk),
+                'frequency': float(frequency_score),
+                'severity': float(severity_score),
+                'recency': float(recent_score),
+                'total_events': total_events,
+                'time_window': time_window
+            })
         
         if not risk_scores:
             return pd.DataFrame()
@@ -10,10 +10,13 @@ import numpy as np
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error
 from scipy import stats
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Optional
 import logging
+import time
 from datetime import datetime, timedelta
 
+from .etl_processor import AnalyticsBundle
+
 class PredictionEngine:
     """预测引擎 - 实现5个独立灾害预测模型
     
@@ -47,32 +50,36 @@ class PredictionEngine:
         
         return True
         
-    def generate_predictions(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def generate_predictions(self, df: pd.DataFrame,
+                             bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """生成所有类型的预测结果
         
         优化：
         - 数据验证
         - 性能监控
         - 异常处理
+        - 复用请求级共享列数组（bundle，未传入时由df构建）
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         try:
             # 数据验证
             if not self._validate_dataframe(df):
                 raise ValueError("Invalid dataframe for predictions")
+            if bundle is None:
+                bundle = AnalyticsBundle.from_frame(df)
             
             # 并行生成所有预测（可以考虑使用ThreadPoolExecutor）
             predictions = {
-                "earthquakePrediction": self._earthquake_prediction_model(df),
-                "volcanoPrediction": self._volcano_prediction_model(df),
-                "stormPrediction": self._storm_prediction_model(df),
-                "floodPrediction": self._flood_prediction_model(df),
-                "wildfirePrediction": self._wildfire_prediction_model(df),
+                "earthquakePrediction": self._earthquake_prediction_model(df, bundle),
+                "volcanoPrediction": self._volcano_prediction_model(df, bundle),
+                "stormPrediction": self._storm_prediction_model(df, bundle),
+                "floodPrediction": self._flood_prediction_model(df, bundle),
+                "wildfirePrediction": self._wildfire_prediction_model(df, bundle),
                 "overallRiskAssessment": self._aggregate_risk_assessment(df)
             }
             
-            elapsed = (datetime.now() - start_time).total_seconds()
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
             self.logger.info(f"Predictions generated in {elapsed:.3f}s for {len(df)} records")
             
             return predictions
@@ -82,46 +89,32 @@ class PredictionEngine:
             raise
     
     def _prepare_time_series_data(self, df: pd.DataFrame, hazard_type: str, 
-                                   window_days: int = 30) -> Tuple[np.ndarray, np.ndarray]:
-        """准备时间序列数据用于线性回归（优化：添加移动平均特征）"""
+                                   window_days: int = 30,
+                                   bundle: Optional[AnalyticsBundle] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """准备时间序列数据用于线性回归
+        
+        在共享的日历日数组上按类型编码筛选，np.bincount按日计数并补零，
+        等价于筛选→groupby(date)→reindex(date_range, fill_value=0)
+        """
+        if bundle is None:
+            bundle = AnalyticsBundle.from_frame(df)
+        
         # 筛选特定类型的灾害
-        filtered_df = df[df['type'] == hazard_type].copy()
+        days = bundle.days[bundle.type_mask(hazard_type)]
+        days = days[~np.isnat(days)].view(np.int64)
         
-        if len(filtered_df) == 0:
+        if len(days) == 0:
             return np.array([]), np.array([])
         
-        # 按日期聚合
-        filtered_df['date'] = pd.to_datetime(filtered_df['timestamp']).dt.date
-        daily_counts = filtered_df.groupby('date').size().reset_index(name='count')
-        daily_counts['date'] = pd.to_datetime(daily_counts['date'])
-        
-        # 填充缺失日期
-        if len(daily_counts) > 0:
-            date_range = pd.date_range(
-                start=daily_counts['date'].min(),
-                end=daily_counts['date'].max(),
-                freq='D'
-            )
-            daily_counts = daily_counts.set_index('date').reindex(date_range, fill_value=0).reset_index()
-            daily_counts.columns = ['date', 'count']
-            
-            # 只取最近window_days天
-            if len(daily_counts) > window_days:
-                daily_counts = daily_counts.tail(window_days)
-            
-            # 特征工程：添加移动平均
-            if len(daily_counts) >= 7:
-                daily_counts['ma_3'] = daily_counts['count'].rolling(window=3, min_periods=1).mean()
-                daily_counts['ma_7'] = daily_counts['count'].rolling(window=7, min_periods=1).mean()
-            
-            X = np.arange(len(daily_counts)).reshape(-1, 1)
-            y = daily_counts['count'].values
-            
-            return X, y
+        # 按日期聚合（含缺失日期的0计数），只取最近window_days天
+        first = days.min()
+        y = np.bincount(days - first)[-window_days:]
+        X = np.arange(len(y)).reshape(-1, 1)
         
-        return np.array([]), np.array([])
+        return X, y
     
-    def _earthquake_prediction_model(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _earthquake_prediction_model(self, df: pd.DataFrame,
+                                     bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """地震预测模型 - 基于30天滑动窗口"""
         try:
             # 筛选震级 >= 4.0 的地震
@@ -134,7 +127,7 @@ class PredictionEngine:
                     "dataPoints": len(earthquakes)
                 }
             
-            X, y = self._prepare_time_series_data(df, 'EARTHQUAKE', window_days=30)
+            X, y = self._prepare_time_series_data(df, 'EARTHQUAKE', window_days=30, bundle=bundle)
             
             if len(X) < 3:
                 return {"type": "EARTHQUAKE", "status": "insufficient_data"}
@@ -178,7 +171,8 @@ class PredictionEngine:
             self.logger.error(f"Earthquake prediction failed: {e}")
             return {"type": "EARTHQUAKE", "error": str(e)}
     
-    def _volcano_prediction_model(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _volcano_prediction_model(self, df: pd.DataFrame,
+                                  bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """火山预测模型 - 关联地震数据分析"""
         try:
             volcanoes = df[df['type'] == 'VOLCANO'].copy()
@@ -187,7 +181,7 @@ class PredictionEngine:
             if len(volcanoes) < 3:
                 return {"type": "VOLCANO", "status": "insufficient_data"}
             
-            X, y = self._prepare_time_series_data(df, 'VOLCANO', window_days=30)
+            X, y = self._prepare_time_series_data(df, 'VOLCANO', window_days=30, bundle=bundle)
             
             if len(X) < 3:
                 return {"type": "VOLCANO", "status": "insufficient_data"}
@@ -227,7 +221,8 @@ class PredictionEngine:
             self.logger.error(f"Volcano prediction failed: {e}")
             return {"type": "VOLCANO", "error": str(e)}
     
-    def _storm_prediction_model(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _storm_prediction_model(self, df: pd.DataFrame,
+                                bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """风暴预测模型 - 季节性分解"""
         try:
             storms = df[df['type'].isin(['STORM', 'HURRICANE', 'TYPHOON'])].copy()
@@ -235,10 +230,10 @@ class PredictionEngine:
             if len(storms) < 5:
                 return {"type": "STORM", "status": "insufficient_data"}
             
-            X, y = self._prepare_time_series_data(df, 'STORM', window_days=30)
+            X, y = self._prepare_time_series_data(df, 'STORM', window_days=30, bundle=bundle)
             
             if len(X) < 3:
-                X_alt, y_alt = self._prepare_time_series_data(df, 'HURRICANE', window_days=30)
+                X_alt, y_alt = self._prepare_time_series_data(df, 'HURRICANE', window_days=30, bundle=bundle)
                 if len(X_alt) >= 3:
                     X, y = X_alt, y_alt
                 else:
@@ -278,7 +273,8 @@ class PredictionEngine:
             self.logger.error(f"Storm prediction failed: {e}")
             return {"type": "STORM", "error": str(e)}
     
-    def _flood_prediction_model(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _flood_prediction_model(self, df: pd.DataFrame,
+                                bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """洪水预测模型 - 级联灾害建模"""
         try:
             floods = df[df['type'] == 'FLOOD'].copy()
@@ -287,7 +283,7 @@ class PredictionEngine:
             if len(floods) < 3:
                 return {"type": "FLOOD", "status": "insufficient_data"}
             
-            X, y = self._prepare_time_series_data(df, 'FLOOD', window_days=30)
+            X, y = self._prepare_time_series_data(df, 'FLOOD', window_days=30, bundle=bundle)
             
             if len(X) < 3:
                 return {"type": "FLOOD", "status": "insufficient_data"}
@@ -327,7 +323,8 @@ class PredictionEngine:
             self.logger.error(f"Flood prediction failed: {e}")
             return {"type": "FLOOD", "error": str(e)}
     
-    def _wildfire_prediction_model(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _wildfire_prediction_model(self, df: pd.DataFrame,
+                                   bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """野火预测模型 - 多因子回归"""
         try:
             wildfires = df[df['type'] == 'WILDFIRE'].copy()
@@ -335,7 +332,7 @@ class PredictionEngine:
             if len(wildfires) < 3:
                 return {"type": "WILDFIRE", "status": "insufficient_data"}
             
-            X, y = self._prepare_time_series_data(df, 'WILDFIRE', window_days=30)
+            X, y = self._prepare_time_series_data(df, 'WILDFIRE', window_days=30, bundle=bundle)
             
             if len(X) < 3:
                 return {"type": "WILDFIRE", "status": "insufficient_data"}
@@ -493,3 +490,21 @@ class PredictionEngine:
             return "Moderate risk. Continue regular monitoring and update contingency plans."
         else:
             return "Low risk. Maintain standard monitoring procedures."
+
+
+# ==================== 进程池工作函数 ====================
+# 回归模型的拟合包含大量Python层开销（sklearn估计器、逐类型建模），线程受GIL限制；
+# 服务端可将预测放入独立进程执行，工作进程只导入本模块
+
+_worker_engine: Optional[PredictionEngine] = None
+
+def init_prediction_worker() -> None:
+    """进程池初始化函数：在工作进程内预先构建预测引擎"""
+    global _worker_engine
+    _worker_engine = PredictionEngine()
+
+def predict_in_worker(df: pd.DataFrame, bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
+    """在工作进程内生成预测（df只需包含type/timestamp/magnitude列）"""
+    if _worker_engine is None:
+        init_prediction_worker()
+    return _worker_engine.generate_predictions(df, bundle)
@@ -59,9 +59,12 @@ class DataQualityMonitor:
         if df.empty:
             return self._empty_quality_report(source)
         
+        # 各列非空计数只统计一次，完整性与准确性共用
+        non_null = df.count()
+        
         # 评估各个维度
-        completeness = self._check_completeness(df)
-        accuracy = self._check_accuracy(df)
+        completeness = self._check_completeness(df, non_null)
+        accuracy = self._check_accuracy(df, non_null)
         consistency = self._check_consistency(df)
         timeliness = self._check_timeliness(df)
         validity = self._check_validity(df)
@@ -119,7 +122,7 @@ class DataQualityMonitor:
         
         return report
     
-    def _check_completeness(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _check_completeness(self, df: pd.DataFrame, non_null: pd.Series = None) -> Dict[str, Any]:
         """
         维度1: 完整性检查
         检查必填字段是否完整、缺失值比例
@@ -136,9 +139,10 @@ class DataQualityMonitor:
         # 计算各字段完整度
         field_completeness = {}
         total_completeness = 0
+        if non_null is None:
+            non_null = df.count()
         
-        for col in df.columns:
-            non_null_count = df[col].notna().sum()
+        for col, non_null_count in non_null.items():
             completeness_rate = non_null_count / len(df) if len(df) > 0 else 0
             field_completeness[col] = round(completeness_rate, 4)
             
@@ -160,7 +164,7 @@ class DataQualityMonitor:
             'recommendations': recommendations
         }
     
-    def _check_accuracy(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _check_accuracy(self, df: pd.DataFrame, non_null: pd.Series = None) -> Dict[str, Any]:
         """
         维度2: 准确性检查
         检查数据范围、格式、异常值
@@ -169,18 +173,19 @@ class DataQualityMonitor:
         recommendations = []
         out_of_range_count = 0
         total_checks = 0
+        if non_null is None:
+            non_null = df.count()
         
-        # 检查数值范围
+        # 检查数值范围（NaN比较结果为False，无需再与非空掩码相与）
         for field, (min_val, max_val) in self.DATA_CONSTRAINTS.items():
             if field in df.columns:
-                valid_data = df[field].notna()
-                total_checks += valid_data.sum()
+                total_checks += non_null[field]
                 
-                out_of_range = valid_data & ((df[field] < min_val) | (df[field] > max_val))
-                out_of_range_count += out_of_range.sum()
+                values = df[field]
+                count = ((values < min_val) | (values > max_val)).sum()
+                out_of_range_count += count
                 
-                if out_of_range.any():
-                    count = out_of_range.sum()
+                if count > 0:
                     issues.append(f"Field '{field}' has {count} values out of range [{min_val}, {max_val}]")
                     recommendations.append(f"Validate and correct out-of-range values in '{field}'")
         
@@ -361,24 +366,24 @@ class DataQualityMonitor:
                 issues.append(f"{count} records have low confidence (<0.5)")
                 recommendations.append("Review and verify low-confidence records")
         
-        # 检查严重程度与震级匹配
+        # 检查严重程度与震级匹配：只取critical记录按类型一次分组，不再逐类型过滤全表
         if 'severity' in df.columns and 'magnitude' in df.columns and 'type' in df.columns:
-            for hazard_type in df['type'].unique():
-                type_mask = df['type'] == hazard_type
-                type_data = df[type_mask]
-                
+            critical_data = df.loc[(df['severity'] == 'critical').to_numpy(dtype=bool), ['type', 'magnitude']]
+            if not critical_data.empty:
                 # 简单检查：critical级别应该有较高的magnitude
-                critical_mask = type_data['severity'] == 'critical'
-                if critical_mask.any():
-                    critical_data = type_data[critical_mask]
-                    low_mag_critical = critical_data['magnitude'] < 5.0  # 示例阈值
-                    
-                    if low_mag_critical.any():
-                        count = low_mag_critical.sum()
+                low_mag_critical = critical_data['magnitude'] < 5.0  # 示例阈值
+                per_type = low_mag_critical.groupby(critical_data['type'], observed=True, sort=False).agg(['size', 'sum'])
+                
+                # 按类型首次出现的顺序输出，与逐类型检查一致
+                for hazard_type in df['type'].unique():
+                    if hazard_type not in per_type.index:
+                        continue
+                    critical_total, count = per_type.loc[hazard_type]
+                    if count > 0:
                         issues.append(f"{count} {hazard_type} records marked 'critical' have low magnitude")
                         recommendations.append(f"Recalculate severity for {hazard_type} events")
                         invalid_count += count
-                        total_checks += len(critical_data)
+                        total_checks += critical_total
         
         # 检查人口暴露合理性
         if 'populationExposed' in df.columns:
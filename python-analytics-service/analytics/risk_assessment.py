@@ -6,9 +6,12 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+
+from .etl_processor import AnalyticsBundle
 
 def clean_for_json(obj):
     """清理数据中的NaN和Infinity值，使其可以被JSON序列化"""
@@ -68,31 +71,39 @@ class RiskAssessor:
         
         return True
         
-    def calculate_comprehensive_risk(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def calculate_comprehensive_risk(self, df: pd.DataFrame,
+                                     bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """计算综合风险评估
         
         优化：
         - 数据验证
         - 性能监控
         - 更好的错误处理
+        - 复用请求级共享列数组（bundle，未传入时由df构建）
         """
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         
         try:
             # 数据验证
             if not self._validate_dataframe(df):
                 raise ValueError("Invalid dataframe for risk assessment")
+            if bundle is None:
+                bundle = AnalyticsBundle.from_frame(df)
+            
+            # 时间维度与总体风险只算一次，趋势和建议直接复用
+            temporal = self._analyze_temporal_risks(df, bundle)
+            overall = self._calculate_overall_risk(df, temporal)
             
             risk_results = {
-                "overallRiskScore": self._calculate_overall_risk(df),
-                "typeRisks": self._calculate_type_risks(df),
-                "geographicRisks": self._identify_high_risk_regions(df),
-                "temporalRisks": self._analyze_temporal_risks(df),
-                "populationImpact": self._assess_population_impact(df),
-                "recommendations": self._generate_recommendations(df)
+                "overallRiskScore": overall,
+                "typeRisks": self._calculate_type_risks(df, bundle),
+                "geographicRisks": self._identify_high_risk_regions(df, bundle),
+                "temporalRisks": temporal,
+                "populationImpact": self._assess_population_impact(df, bundle),
+                "recommendations": self._generate_recommendations(df, overall, temporal)
             }
             
-            elapsed = (datetime.now() - start_time).total_seconds()
+            elapsed = (time.perf_counter_ns() - start_ns) / 1e9
             self.logger.info(f"Risk assessment completed in {elapsed:.3f}s for {len(df)} records")
             
             # 清理所有NaN和Infinity值
@@ -102,7 +113,8 @@ class RiskAssessor:
             self.logger.error(f"Risk assessment failed: {e}", exc_info=True)
             raise
     
-    def _calculate_overall_risk(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_overall_risk(self, df: pd.DataFrame,
+                                temporal: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """计算总体风险分数"""
         if len(df) == 0:
             return {"score": 0, "level": "MINIMAL"}
@@ -118,8 +130,9 @@ class RiskAssessor:
         # 严重性加权
         if 'severity' in df.columns:
             severity_weights = {'HIGH': 1.5, 'MODERATE': 1.0, 'LOW': 0.5}
+            severity_counts = df['severity'].value_counts()
             for severity, multiplier in severity_weights.items():
-                count = len(df[df['severity'] == severity])
+                count = int(severity_counts.get(severity, 0))
                 weighted_score += count * multiplier
         
         # 标准化到0-100
@@ -130,19 +143,37 @@ class RiskAssessor:
         return {
             "score": round(normalized_score, 1),
             "level": risk_level,
-            "trend": self._calculate_risk_trend(df)
+            "trend": self._calculate_risk_trend(df, temporal)
         }
     
-    def _calculate_type_risks(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _calculate_type_risks(self, df: pd.DataFrame,
+                              bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """按类型计算风险"""
+        if bundle is None:
+            bundle = AnalyticsBundle.from_frame(df)
         type_risks = {}
         
-        for hazard_type in df['type'].unique():
-            type_df = df[df['type'] == hazard_type]
+        # 按类型编码计数，逐类型只对整数编码和震级数组做掩码，不筛选整表
+        codes = bundle.type_codes
+        present_codes = codes[codes >= 0]
+        type_counts = np.bincount(present_codes, minlength=len(bundle.type_categories))
+        has_magnitude = 'magnitude' in df.columns
+        
+        # 按首次出现顺序输出（与Series.unique()一致）
+        _, first_seen = np.unique(present_codes, return_index=True)
+        for code in present_codes[np.sort(first_seen)]:
+            hazard_type = bundle.type_categories[code]
             
             # 计算该类型的风险分数
-            count = len(type_df)
-            avg_magnitude = type_df['magnitude'].mean() if 'magnitude' in type_df.columns else 5.0
+            count = int(type_counts[code])
+            if has_magnitude:
+                # 与Series.mean()相同：缺失值按0求和，再除以有效个数
+                magnitudes = bundle.magnitude[codes == code]
+                known = ~np.isnan(magnitudes)
+                n_known = int(known.sum())
+                avg_magnitude = np.where(known, magnitudes, 0.0).sum() / n_known if n_known else np.nan
+            else:
+                avg_magnitude = 5.0
             
             risk_score = count * avg_magnitude * self.risk_weights.get(hazard_type, 0.1)
             
@@ -155,47 +186,55 @@ class RiskAssessor:
         
         return type_risks
     
-    def _identify_high_risk_regions(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+    def _identify_high_risk_regions(self, df: pd.DataFrame,
+                                    bundle: Optional[AnalyticsBundle] = None) -> List[Dict[str, Any]]:
         """识别高风险地理区域"""
         if 'coordinates' not in df.columns or len(df) == 0:
             return []
+        if bundle is None:
+            bundle = AnalyticsBundle.from_frame(df)
         
         # 简化：基于灾害密度识别热点
         # 实际应用中可以使用DBSCAN聚类
         
-        # 按经纬度网格统计
-        df_copy = df.copy()
-        df_copy['lat'] = df_copy['coordinates'].apply(lambda x: round(x[1], 0) if isinstance(x, list) and len(x) >= 2 else 0)
-        df_copy['lon'] = df_copy['coordinates'].apply(lambda x: round(x[0], 0) if isinstance(x, list) and len(x) >= 2 else 0)
+        # 按经纬度网格统计：直接使用共享坐标数组，无效坐标归入(0, 0)
+        grid = pd.DataFrame({
+            'lat': np.where(bundle.has_coords, np.round(bundle.lat), 0.0),
+            'lon': np.where(bundle.has_coords, np.round(bundle.lon), 0.0)
+        })
         
-        region_counts = df_copy.groupby(['lat', 'lon']).size().reset_index(name='count')
+        region_counts = grid.groupby(['lat', 'lon']).size().reset_index(name='count')
         region_counts = region_counts.sort_values('count', ascending=False).head(5)
         
-        high_risk_regions = []
-        for _, row in region_counts.iterrows():
-            high_risk_regions.append({
-                "location": {"lat": float(row['lat']), "lon": float(row['lon'])},
-                "hazardCount": int(row['count']),
-                "riskLevel": "HIGH" if row['count'] > 10 else "MODERATE"
-            })
-        
-        return high_risk_regions
+        return [
+            {
+                "location": {"lat": float(lat_bin), "lon": float(lon_bin)},
+                "hazardCount": int(count),
+                "riskLevel": "HIGH" if count > 10 else "MODERATE"
+            }
+            for lat_bin, lon_bin, count in zip(region_counts['lat'].to_numpy(),
+                                               region_counts['lon'].to_numpy(),
+                                               region_counts['count'].to_numpy())
+        ]
     
-    def _analyze_temporal_risks(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _analyze_temporal_risks(self, df: pd.DataFrame,
+                                bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """分析时间维度风险"""
         if 'timestamp' not in df.columns:
             return {}
+        if bundle is None:
+            bundle = AnalyticsBundle.from_frame(df)
         
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
+        # 按日粒度比较共享的日历日数组，不在共享的df上追加列
+        days = bundle.days
         
         # 最近7天 vs 前7天
-        now = datetime.now().date()
-        recent_7days = df[df['date'] >= (now - timedelta(days=7))]
-        previous_7days = df[(df['date'] >= (now - timedelta(days=14))) & 
-                           (df['date'] < (now - timedelta(days=7)))]
+        now = np.datetime64(datetime.now().date(), 'D')
+        week_ago = now - np.timedelta64(7, 'D')
+        two_weeks_ago = now - np.timedelta64(14, 'D')
         
-        recent_count = len(recent_7days)
-        previous_count = len(previous_7days)
+        recent_count = int(np.count_nonzero(days >= week_ago))
+        previous_count = int(np.count_nonzero((days >= two_weeks_ago) & (days < week_ago)))
         
         growth_rate = ((recent_count - previous_count) / previous_count * 100) if previous_count > 0 else 0
         
@@ -206,33 +245,43 @@ class RiskAssessor:
             "trend": "increasing" if growth_rate > 10 else ("decreasing" if growth_rate < -10 else "stable")
         }
     
-    def _assess_population_impact(self, df: pd.DataFrame) -> Dict[str, Any]:
+    def _assess_population_impact(self, df: pd.DataFrame,
+                                  bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
         """评估人口影响"""
         if 'populationExposed' not in df.columns:
             return {"totalExposed": 0}
+        if bundle is None:
+            bundle = AnalyticsBundle.from_frame(df)
         
-        total_exposed = df['populationExposed'].sum()
-        high_impact_events = len(df[df['populationExposed'] > 100000])
+        exposed = bundle.pop
+        known = ~np.isnan(exposed)
+        total_exposed = np.where(known, exposed, 0.0).sum()
+        average_exposure = total_exposed / known.sum() if known.any() else np.nan
+        high_impact_events = int(np.count_nonzero(exposed > 100000))
         
         return {
-            "totalExposed": int(total_exposed) if not pd.isna(total_exposed) else 0,
+            "totalExposed": int(total_exposed),
             "highImpactEvents": high_impact_events,
-            "averageExposure": int(df['populationExposed'].mean()) if not pd.isna(df['populationExposed'].mean()) else 0
+            "averageExposure": int(average_exposure) if not pd.isna(average_exposure) else 0
         }
     
-    def _generate_recommendations(self, df: pd.DataFrame) -> List[str]:
+    def _generate_recommendations(self, df: pd.DataFrame,
+                                  overall_risk: Optional[Dict[str, Any]] = None,
+                                  temporal: Optional[Dict[str, Any]] = None) -> List[str]:
         """生成风险建议"""
         recommendations = []
         
         # 基于总体风险
-        overall_risk = self._calculate_overall_risk(df)
+        if temporal is None:
+            temporal = self._analyze_temporal_risks(df)
+        if overall_risk is None:
+            overall_risk = self._calculate_overall_risk(df, temporal)
         if overall_risk['score'] >= 80:
             recommendations.append("CRITICAL: Activate emergency response protocols immediately")
         elif overall_risk['score'] >= 60:
             recommendations.append("HIGH RISK: Enhance monitoring and prepare response teams")
         
         # 基于趋势
-        temporal = self._analyze_temporal_risks(df)
         if temporal.get('trend') == 'increasing':
             recommendations.append(f"Activity increasing by {temporal.get('growthRate', 0):.1f}% - intensify surveillance")
         
@@ -243,9 +292,11 @@ class RiskAssessor:
         
         return recommendations if recommendations else ["Maintain standard monitoring procedures"]
     
-    def _calculate_risk_trend(self, df: pd.DataFrame) -> str:
+    def _calculate_risk_trend(self, df: pd.DataFrame,
+                              temporal: Optional[Dict[str, Any]] = None) -> str:
         """计算风险趋势"""
-        temporal = self._analyze_temporal_risks(df)
+        if temporal is None:
+            temporal = self._analyze_temporal_risks(df)
         return temporal.get('trend', 'stable')
     
     def _get_risk_level(self, score: float) -> str:
@@ -7,9 +7,17 @@
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import logging
+import bisect
+from pandas.api.types import union_categoricals
+
+try:
+    import pyarrow  # noqa: F401
+    _STRING_DTYPE = 'string[pyarrow]'  # Arrow字符串：连续存储，哈希/比较远快于object列
+except ImportError:  # pyarrow为可选依赖，缺失时保留默认的object列
+    _STRING_DTYPE = 'string'
 
 
 class UnifiedHazardModel:
@@ -17,7 +25,7 @@ class UnifiedHazardModel:
     
     # 定义统一的数据模型Schema
     SCHEMA = {
-        'id': 'string',
+        'id': _STRING_DTYPE,
         'type': 'category',          # 灾害类型：earthquake, wildfire, flood等
         'source': 'category',         # 数据源：USGS, NASA, GDACS
         'timestamp': 'datetime64[ns]',
@@ -25,8 +33,8 @@ class UnifiedHazardModel:
         'longitude': 'float64',
         'magnitude': 'float64',       # 震级/强度
         'severity': 'category',       # 严重程度：low, medium, high, critical
-        'title': 'string',
-        'description': 'string',
+        'title': _STRING_DTYPE,
+        'description': _STRING_DTYPE,
         'populationExposed': 'float64',
         'confidence': 'float64'       # 数据置信度 0-1
     }
@@ -41,6 +49,23 @@ class UnifiedHazardModel:
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # 预先编译Schema：列顺序和每列的目标类型只解析一次
+        # （默认'string'列保持object不转换，目标类型记为None）
+        self._columns = tuple(self.SCHEMA.keys())
+        self._col_plan = [
+            (col, None if dtype == 'string' else dtype if dtype == 'category' else pd.api.types.pandas_dtype(dtype))
+            for col, dtype in self.SCHEMA.items()
+        ]
+        # 严重程度分级边界（medium/high/critical），供searchsorted批量分级
+        self._severity_bounds = {
+            hazard_type: np.array([t['medium'], t['high'], t['critical']], dtype=np.float64)
+            for hazard_type, t in self.SEVERITY_THRESHOLDS.items()
+        }
+        self._severity_labels = np.array(['low', 'medium', 'high', 'critical'], dtype=object)
+        # 标量版本：bisect在元组上查找，替代逐级if/elif比较
+        self._severity_steps = {
+            hazard_type: tuple(bounds.tolist()) for hazard_type, bounds in self._severity_bounds.items()
+        }
     
     def create_empty_dataframe(self) -> pd.DataFrame:
         """创建符合统一Schema的空DataFrame"""
@@ -55,16 +80,59 @@ class UnifiedHazardModel:
     
     def calculate_severity(self, hazard_type: str, magnitude: float) -> str:
         """根据灾害类型和震级计算严重程度"""
-        thresholds = self.SEVERITY_THRESHOLDS.get(hazard_type, self.SEVERITY_THRESHOLDS['default'])
-        
-        if magnitude >= thresholds['critical']:
-            return 'critical'
-        elif magnitude >= thresholds['high']:
-            return 'high'
-        elif magnitude >= thresholds['medium']:
-            return 'medium'
-        else:
+        steps = self._severity_steps.get(hazard_type, self._severity_steps['default'])
+        if magnitude != magnitude:  # NaN与任何阈值比较均为False，归为low
             return 'low'
+        return self._severity_labels[bisect.bisect_right(steps, magnitude)]
+    
+    def _fill_severity(self, df: pd.DataFrame) -> pd.DataFrame:
+        """按灾害类型批量计算严重程度（与calculate_severity逐条结果一致）"""
+        magnitudes = df['magnitude'].to_numpy(dtype=np.float64)
+        types = df['type'].to_numpy()
+        codes = np.zeros(len(df), dtype=np.intp)
+        for hazard_type in pd.unique(types):
+            mask = types == hazard_type
+            bounds = self._severity_bounds.get(hazard_type, self._severity_bounds['default'])
+            codes[mask] = np.searchsorted(bounds, magnitudes[mask], side='right')
+        # NaN与任何阈值比较均为False，逐条计算时落入low
+        codes[np.isnan(magnitudes)] = 0
+        df['severity'] = self._severity_labels[codes]
+        return df
+    
+    def _parse_timestamps(self, values: np.ndarray, source: str,
+                          unit: Optional[str] = None) -> Tuple[pd.DatetimeIndex, Optional[np.ndarray]]:
+        """批量解析时间戳为UTC时间
+        
+        整列一次性转换（字符串按ISO8601解析）；若存在无法解析的值，
+        退回逐条解析并返回有效行掩码，无法解析的记录与逐条转换时一样被跳过
+        """
+        try:
+            if unit is not None:
+                return pd.to_datetime(values, unit=unit, utc=True), None
+            return pd.to_datetime(values, utc=True, format='ISO8601'), None
+        except Exception:
+            pass
+        
+        parsed = []
+        valid = np.ones(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                parsed.append(pd.to_datetime(value, unit=unit, utc=True))
+            except Exception as e:
+                self.logger.warning(f"Failed to transform {source} record: {e}")
+                parsed.append(pd.NaT)
+                valid[i] = False
+        return pd.DatetimeIndex(parsed), valid
+    
+    def _build_frame(self, columns: Dict[str, Any], valid: Optional[np.ndarray]) -> pd.DataFrame:
+        """由列数组构建DataFrame，剔除时间戳无法解析的记录并应用Schema"""
+        df = pd.DataFrame(columns)
+        if valid is not None:
+            df = df[valid].reset_index(drop=True)
+            if df.empty:
+                return self.create_empty_dataframe()
+        df = self._fill_severity(df)
+        return self._apply_schema(df)
     
     def transform_usgs_to_unified(self, usgs_data: List[Dict]) -> pd.DataFrame:
         """
@@ -87,39 +155,52 @@ class UnifiedHazardModel:
         if not usgs_data:
             return self.create_empty_dataframe()
         
-        transformed = []
+        # 按列预分配数组（SoA），逐条填充后一次性构建DataFrame
+        n = len(usgs_data)
+        ids = np.empty(n, dtype=object)
+        timestamps = np.empty(n, dtype=object)
+        latitudes = np.empty(n, dtype=np.float64)
+        longitudes = np.empty(n, dtype=np.float64)
+        magnitudes = np.empty(n, dtype=np.float64)
+        titles = np.empty(n, dtype=object)
+        descriptions = np.empty(n, dtype=object)
+        count = 0
         for item in usgs_data:
             try:
                 properties = item.get('properties', {})
                 geometry = item.get('geometry', {})
                 coords = geometry.get('coordinates', [0, 0, 0])
                 
-                magnitude = float(properties.get('mag', 0))
-                
-                record = {
-                    'id': item.get('id', ''),
-                    'type': 'earthquake',
-                    'source': 'USGS',
-                    'timestamp': pd.to_datetime(properties.get('time', 0), unit='ms', utc=True),
-                    'latitude': float(coords[1]) if len(coords) > 1 else 0.0,
-                    'longitude': float(coords[0]) if len(coords) > 0 else 0.0,
-                    'magnitude': magnitude,
-                    'severity': self.calculate_severity('earthquake', magnitude),
-                    'title': properties.get('title', ''),
-                    'description': properties.get('place', ''),
-                    'populationExposed': 0.0,  # USGS不提供此数据
-                    'confidence': 0.95  # USGS数据高可信度
-                }
-                transformed.append(record)
+                magnitudes[count] = float(properties.get('mag', 0))
+                ids[count] = item.get('id', '')
+                timestamps[count] = properties.get('time', 0)
+                latitudes[count] = float(coords[1]) if len(coords) > 1 else 0.0
+                longitudes[count] = float(coords[0]) if len(coords) > 0 else 0.0
+                titles[count] = properties.get('title', '')
+                descriptions[count] = properties.get('place', '')
+                count += 1  # 失败的记录不计数，其位置由下一条记录覆盖
             except Exception as e:
                 self.logger.warning(f"Failed to transform USGS record: {e}")
                 continue
         
-        if not transformed:
+        if count == 0:
             return self.create_empty_dataframe()
         
-        df = pd.DataFrame(transformed)
-        return self._apply_schema(df)
+        # 时间戳在循环外整列一次性解析
+        parsed, valid = self._parse_timestamps(timestamps[:count], 'USGS', unit='ms')
+        return self._build_frame({
+            'id': ids[:count],
+            'type': 'earthquake',
+            'source': 'USGS',
+            'timestamp': parsed,
+            'latitude': latitudes[:count],
+            'longitude': longitudes[:count],
+            'magnitude': magnitudes[:count],
+            'title': titles[:count],
+            'description': descriptions[:count],
+            'populationExposed': 0.0,  # USGS不提供此数据
+            'confidence': 0.95  # USGS数据高可信度
+        }, valid)
     
     def transform_nasa_to_unified(self, nasa_data: List[Dict]) -> pd.DataFrame:
         """
@@ -141,22 +222,30 @@ class UnifiedHazardModel:
         if not nasa_data:
             return self.create_empty_dataframe()
         
-        transformed = []
+        # 映射NASA类型到标准类型
+        type_mapping = {
+            'wildfires': 'wildfire',
+            'severe storms': 'storm',
+            'floods': 'flood',
+            'volcanoes': 'volcano'
+        }
+        
+        # 按列预分配数组（SoA），逐条填充后一次性构建DataFrame
+        n = len(nasa_data)
+        ids = np.empty(n, dtype=object)
+        types = np.empty(n, dtype=object)
+        timestamps = np.empty(n, dtype=object)
+        latitudes = np.empty(n, dtype=np.float64)
+        longitudes = np.empty(n, dtype=np.float64)
+        titles = np.empty(n, dtype=object)
+        descriptions = np.empty(n, dtype=object)
+        count = 0
         for event in nasa_data:
             try:
                 # 获取分类
                 categories = event.get('categories', [])
                 event_type = categories[0].get('title', 'unknown').lower() if categories else 'unknown'
                 
-                # 映射NASA类型到标准类型
-                type_mapping = {
-                    'wildfires': 'wildfire',
-                    'severe storms': 'storm',
-                    'floods': 'flood',
-                    'volcanoes': 'volcano'
-                }
-                hazard_type = type_mapping.get(event_type, event_type)
-                
                 # 获取最新几何位置
                 geometries = event.get('geometry', [])
                 if not geometries:
@@ -165,33 +254,36 @@ class UnifiedHazardModel:
                 latest_geo = geometries[-1]
                 coords = latest_geo.get('coordinates', [0, 0])
                 
-                # NASA数据没有magnitude，使用估算值
-                estimated_magnitude = 500.0  # 默认中等强度
-                
-                record = {
-                    'id': event.get('id', ''),
-                    'type': hazard_type,
-                    'source': 'NASA',
-                    'timestamp': pd.to_datetime(latest_geo.get('date', datetime.now().isoformat()), utc=True),
-                    'latitude': float(coords[1]) if len(coords) > 1 else 0.0,
-                    'longitude': float(coords[0]) if len(coords) > 0 else 0.0,
-                    'magnitude': estimated_magnitude,
-                    'severity': self.calculate_severity(hazard_type, estimated_magnitude),
-                    'title': event.get('title', ''),
-                    'description': event.get('description', ''),
-                    'populationExposed': 0.0,
-                    'confidence': 0.85  # NASA数据较高可信度
-                }
-                transformed.append(record)
+                ids[count] = event.get('id', '')
+                types[count] = type_mapping.get(event_type, event_type)
+                timestamps[count] = latest_geo.get('date', datetime.now().isoformat())
+                latitudes[count] = float(coords[1]) if len(coords) > 1 else 0.0
+                longitudes[count] = float(coords[0]) if len(coords) > 0 else 0.0
+                titles[count] = event.get('title', '')
+                descriptions[count] = event.get('description', '')
+                count += 1  # 失败的记录不计数，其位置由下一条记录覆盖
             except Exception as e:
                 self.logger.warning(f"Failed to transform NASA record: {e}")
                 continue
         
-        if not transformed:
+        if count == 0:
             return self.create_empty_dataframe()
         
-        df = pd.DataFrame(transformed)
-        return self._apply_schema(df)
+        # 时间戳在循环外整列一次性解析
+        parsed, valid = self._parse_timestamps(timestamps[:count], 'NASA')
+        return self._build_frame({
+            'id': ids[:count],
+            'type': types[:count],
+            'source': 'NASA',
+            'timestamp': parsed,
+            'latitude': latitudes[:count],
+            'longitude': longitudes[:count],
+            'magnitude': 500.0,  # NASA数据没有magnitude，使用估算值（默认中等强度）
+            'title': titles[:count],
+            'description': descriptions[:count],
+            'populationExposed': 0.0,
+            'confidence': 0.85  # NASA数据较高可信度
+        }, valid)
     
     def transform_gdacs_to_unified(self, gdacs_data: List[Dict]) -> pd.DataFrame:
         """
@@ -217,83 +309,96 @@ class UnifiedHazardModel:
         if not gdacs_data:
             return self.create_empty_dataframe()
         
-        transformed = []
+        # 映射GDACS事件类型
+        event_type_mapping = {
+            'EQ': 'earthquake',
+            'FL': 'flood',
+            'TC': 'cyclone',
+            'VO': 'volcano',
+            'WF': 'wildfire'
+        }
+        # GDACS alert level映射到置信度
+        alert_levels = {'Red': 0.95, 'Orange': 0.85, 'Green': 0.70}
+        
+        # 按列预分配数组（SoA），逐条填充后一次性构建DataFrame
+        n = len(gdacs_data)
+        ids = np.empty(n, dtype=object)
+        types = np.empty(n, dtype=object)
+        timestamps = np.empty(n, dtype=object)
+        latitudes = np.empty(n, dtype=np.float64)
+        longitudes = np.empty(n, dtype=np.float64)
+        magnitudes = np.empty(n, dtype=np.float64)
+        titles = np.empty(n, dtype=object)
+        descriptions = np.empty(n, dtype=object)
+        populations = np.empty(n, dtype=np.float64)
+        confidences = np.empty(n, dtype=np.float64)
+        count = 0
         for item in gdacs_data:
             try:
-                # 映射GDACS事件类型
-                event_type_mapping = {
-                    'EQ': 'earthquake',
-                    'FL': 'flood',
-                    'TC': 'cyclone',
-                    'VO': 'volcano',
-                    'WF': 'wildfire'
-                }
-                
                 event_type = item.get('eventtype', 'unknown')
-                hazard_type = event_type_mapping.get(event_type, 'unknown')
+                types[count] = event_type_mapping.get(event_type, 'unknown')
                 
                 severity_data = item.get('severitydata', {})
-                magnitude = float(severity_data.get('magnitude', 0))
+                magnitudes[count] = float(severity_data.get('magnitude', 0))
                 
                 population = item.get('population', {})
-                pop_exposed = float(population.get('value', 0))
+                populations[count] = float(population.get('value', 0))
                 
-                # GDACS alert level映射到置信度
-                alert_levels = {'Red': 0.95, 'Orange': 0.85, 'Green': 0.70}
                 alert_level = item.get('alertlevel', 'Green')
-                confidence = alert_levels.get(alert_level, 0.75)
+                confidences[count] = alert_levels.get(alert_level, 0.75)
                 
-                record = {
-                    'id': str(item.get('id', '')),
-                    'type': hazard_type,
-                    'source': 'GDACS',
-                    'timestamp': pd.to_datetime(item.get('fromdate', datetime.now().isoformat()), utc=True),
-                    'latitude': float(item.get('latitude', 0)),
-                    'longitude': float(item.get('longitude', 0)),
-                    'magnitude': magnitude,
-                    'severity': self.calculate_severity(hazard_type, magnitude),
-                    'title': item.get('name', ''),
-                    'description': item.get('description', ''),
-                    'populationExposed': pop_exposed,
-                    'confidence': confidence
-                }
-                transformed.append(record)
+                ids[count] = str(item.get('id', ''))
+                timestamps[count] = item.get('fromdate', datetime.now().isoformat())
+                latitudes[count] = float(item.get('latitude', 0))
+                longitudes[count] = float(item.get('longitude', 0))
+                titles[count] = item.get('name', '')
+                descriptions[count] = item.get('description', '')
+                count += 1  # 失败的记录不计数，其位置由下一条记录覆盖
             except Exception as e:
                 self.logger.warning(f"Failed to transform GDACS record: {e}")
                 continue
         
-        if not transformed:
+        if count == 0:
             return self.create_empty_dataframe()
         
-        df = pd.DataFrame(transformed)
-        return self._apply_schema(df)
+        # 时间戳在循环外整列一次性解析
+        parsed, valid = self._parse_timestamps(timestamps[:count], 'GDACS')
+        return self._build_frame({
+            'id': ids[:count],
+            'type': types[:count],
+            'source': 'GDACS',
+            'timestamp': parsed,
+            'latitude': latitudes[:count],
+            'longitude': longitudes[:count],
+            'magnitude': magnitudes[:count],
+            'title': titles[:count],
+            'description': descriptions[:count],
+            'populationExposed': populations[:count],
+            'confidence': confidences[:count]
+        }, valid)
     
     def _apply_schema(self, df: pd.DataFrame) -> pd.DataFrame:
         """应用统一Schema的数据类型"""
-        for col, dtype in self.SCHEMA.items():
+        for col, dtype in self._col_plan:
             if col not in df.columns:
                 # 添加缺失列
-                if dtype == 'category':
+                if dtype is None or isinstance(dtype, pd.StringDtype):
+                    df[col] = ''
+                elif dtype == 'category':
                     df[col] = pd.Categorical([])
-                elif dtype == 'datetime64[ns]':
+                elif dtype.kind == 'M':
                     df[col] = pd.NaT
-                elif dtype == 'float64':
-                    df[col] = np.nan
                 else:
-                    df[col] = ''
-            else:
-                # 转换数据类型
+                    df[col] = np.nan
+            elif dtype is not None and df[col].dtype != dtype:
+                # 仅在类型不一致时转换，避免多余的列拷贝
                 try:
-                    if dtype == 'category':
-                        df[col] = df[col].astype('category')
-                    elif dtype != 'string':
-                        df[col] = df[col].astype(dtype)
+                    df[col] = df[col].astype(dtype, copy=False)
                 except Exception as e:
                     self.logger.warning(f"Failed to convert column {col} to {dtype}: {e}")
         
         # 确保列顺序一致
-        df = df[list(self.SCHEMA.keys())]
-        return df
+        return df.reindex(columns=self._columns, copy=False)
     
     def merge_sources(self, *dataframes: pd.DataFrame) -> pd.DataFrame:
         """合并多个数据源，去重并排序"""
@@ -305,14 +410,32 @@ class UnifiedHazardModel:
         if not valid_dfs:
             return self.create_empty_dataframe()
         
+        # 统一各数据源分类列的类别集合，使合并后仍保持category类型
+        category_cols = [
+            col for col, dtype in self._col_plan
+            if dtype == 'category' and all(
+                isinstance(df[col].dtype, pd.CategoricalDtype) if col in df.columns else False
+                for df in valid_dfs
+            )
+        ]
+        if len(valid_dfs) > 1 and category_cols:
+            categories = {
+                col: union_categoricals([df[col] for df in valid_dfs]).categories
+                for col in category_cols
+            }
+            valid_dfs = [
+                df.assign(**{col: df[col].cat.set_categories(cats) for col, cats in categories.items()})
+                for df in valid_dfs
+            ]
+        
         # 合并所有数据源
-        merged = pd.concat(valid_dfs, ignore_index=True)
+        merged = pd.concat(valid_dfs, ignore_index=True, copy=False, sort=False)
         
         # 去重（基于id和timestamp）
         merged = merged.drop_duplicates(subset=['id', 'timestamp'], keep='first')
         
-        # 按时间戳降序排序
-        merged = merged.sort_values('timestamp', ascending=False)
+        # 按时间戳降序排序（稳定排序，可利用各数据源内已有序的片段）
+        merged = merged.sort_values('timestamp', ascending=False, kind='mergesort')
         
         # 重置索引
         merged = merged.reset_index(drop=True)
@@ -11,22 +11,39 @@ Prometheus Global Guardian - Python Analytics Service
 - 性能监控
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator, model_validator
 from typing import List, Dict, Any, Optional
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
 import hashlib
-import json
-from functools import wraps
+from functools import partial, wraps
 import asyncio
+import time
+import os
+from collections import OrderedDict, deque
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import asynccontextmanager
+
+import anyio.to_thread
+import orjson
+
+try:
+    import xxhash
+except ImportError:  # xxhash为可选依赖，缺失时使用标准库blake2b
+    xxhash = None
 
 from analytics.statistical_algorithms import StatisticalAnalyzer
-from analytics.prediction_models import PredictionEngine
-from analytics.etl_processor import ETLProcessor
+from analytics.prediction_models import PredictionEngine, init_prediction_worker, predict_in_worker
+from analytics.etl_processor import ETLProcessor, AnalyticsBundle
 from analytics.risk_assessment import RiskAssessor
 from analytics.pivot_table_analyzer import FourDimensionalPivotTable
 
@@ -34,12 +51,170 @@ from analytics.pivot_table_analyzer import FourDimensionalPivotTable
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# orjson序列化选项：非字符串字典键、NumPy标量和数组
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _orjson_default(obj: Any) -> Any:
+    """orjson不直接支持的pandas类型"""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError
+
+def dumps_json(content: Any) -> bytes:
+    """orjson序列化；含orjson无法处理的键或类型时，先经jsonable_encoder规范化"""
+    try:
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+    except TypeError:
+        encoded = jsonable_encoder(content, custom_encoder={np.generic: lambda v: v.item()})
+        return orjson.dumps(encoded, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+class FastJSONResponse(ORJSONResponse):
+    """orjson序列化的JSON响应
+    
+    NumPy标量/数组、datetime在C层直接序列化；端点直接返回该响应时跳过jsonable_encoder遍历
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+# 请求体大小上限（字节）：超出时在解析前返回413，超大请求不会为JSON解析和模型校验付出CPU开销
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", 8 * 1024 * 1024))
+
+class ORJSONRequest(Request):
+    """请求体JSON由orjson解析（orjson.JSONDecodeError是json.JSONDecodeError的子类，错误处理不变）
+    
+    请求体按MAX_BODY_BYTES限制大小：Content-Length超限时不读取直接拒绝，
+    未声明长度（分块传输）时边接收边计数，超限即停止接收
+    """
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            declared = self.headers.get("content-length")
+            if declared is not None and declared.isdigit() and int(declared) > MAX_BODY_BYTES:
+                raise HTTPException(status_code=413, detail=f"Request body exceeds {MAX_BODY_BYTES} bytes")
+            chunks = []
+            size = 0
+            async for chunk in self.stream():
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {MAX_BODY_BYTES} bytes")
+                chunks.append(chunk)
+            self._body = b"".join(chunks)
+        return self._body
+    
+    async def json(self) -> Any:
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+class ORJSONRoute(APIRoute):
+    """以ORJSONRequest处理请求的路由：大批量hazards请求体的解析不再经过标准库json"""
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def orjson_route_handler(request: Request) -> Response:
+            return await handler(ORJSONRequest(request.scope, request.receive))
+        
+        return orjson_route_handler
+
+def df_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """DataFrame转记录列表（与to_dict('records')结构相同）
+    
+    各列一次性tolist转为Python对象后按行组装，不做replace({np.nan: None})的整表object拷贝；
+    缺失值（NaN/NaT/NA）由orjson直接输出为null
+    """
+    columns = list(df.columns)
+    return [dict(zip(columns, row)) for row in zip(*(df[col].tolist() for col in columns))]
+
+# 流式响应每批序列化的行数
+STREAM_BATCH_ROWS = 256
+
+async def stream_records(head: bytes, df: pd.DataFrame, tail: bytes):
+    """分批流式输出 head + [记录...] + tail
+    
+    每批只物化STREAM_BATCH_ROWS行的记录字典并立即编码发送，首字节不必等待全部行序列化完成；
+    NaN/NaT由orjson输出为null
+    """
+    yield head + b'['
+    for start in range(0, len(df), STREAM_BATCH_ROWS):
+        chunk = dumps_json(df_records(df.iloc[start:start + STREAM_BATCH_ROWS]))
+        # 去掉批次自身的方括号，批次之间以逗号衔接
+        yield (b',' if start else b'') + chunk[1:-1]
+    yield b']' + tail
+
+CPU_COUNT = os.cpu_count() or 1
+# 同一主机上的服务进程数：python main.py以多worker启动时由__main__写入环境变量，各worker进程继承。
+# 线程池、预测进程池按每个服务进程分到的核心数确定容量，各worker合计不超过主机核心数
+WORKERS = max(1, int(os.getenv("WORKERS", 1)))
+WORKER_CPUS = max(1, CPU_COUNT // WORKERS)
+
+# 分析任务线程池：计算主要在NumPy/pandas的C代码中进行（释放GIL），线程可真正并行。
+# 每个应用生命周期使用一个线程池，退出时关闭并置空，同一进程内再次启动应用时重新创建
+EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+def get_executor() -> ThreadPoolExecutor:
+    """当前的分析线程池，尚未创建（或已随上一个生命周期关闭）时新建"""
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = ThreadPoolExecutor(max_workers=WORKER_CPUS, thread_name_prefix="analytics")
+    return EXECUTOR
+
+# 预测进程池：回归模型拟合以Python层开销为主，放入独立进程绕开GIL，与线程中的统计、风险分析真正并行。
+# 使用spawn启动（服务进程已有线程，不宜fork）。spawn的子进程会重新导入主模块——以python main.py
+# 启动时即main.py本身——因此进程池不在导入时创建，而是在lifespan中创建，子进程导入时不会再建进程池。
+# 默认最多2个工作进程且保留一个核心给服务进程；分到的核心不足两个或PREDICT_WORKERS=0时不使用进程池
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", min(2, WORKER_CPUS - 1)))
+PREDICT_POOL: Optional[ProcessPoolExecutor] = None
+# 小数据量时进程间传输的开销超过收益，仍在线程池中执行
+PREDICT_POOL_MIN_ROWS = 100
+# 预测模型用到的列，只把这些列传给工作进程
+PREDICT_COLUMNS = ['type', 'timestamp', 'magnitude']
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：调整默认线程池容量，创建并预热预测进程池，预热各分析器，退出时关闭分析线程池和预测进程池
+    
+    事件循环的默认执行器也指向分析线程池，run_in_executor(None, ...)和asyncio.to_thread
+    不会再另建一个按 cpu+4 分配的线程池
+    """
+    global EXECUTOR, PREDICT_POOL
+    # 同步端点的线程上限只上调、不下调：低于anyio默认的40时，一个慢请求即可让健康检查、指标等端点排队
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, WORKER_CPUS * 2)
+    loop = asyncio.get_running_loop()
+    # 事件循环结束时（asyncio.run）会关闭默认执行器，因此线程池不能跨生命周期复用
+    executor = get_executor()
+    loop.set_default_executor(executor)
+    if PREDICT_WORKERS > 0:
+        PREDICT_POOL = ProcessPoolExecutor(
+            max_workers=PREDICT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_prediction_worker
+        )
+        # 进程池按需启动工作进程；启动时提交空任务让各进程提前完成spawn和初始化
+        # （导入分析模块、构建预测引擎），首个大请求不再承担进程启动开销；不等待结果
+        for _ in range(PREDICT_WORKERS):
+            PREDICT_POOL.submit(os.getpid)
+    # 分析器预热在接收请求前完成
+    await loop.run_in_executor(executor, warm_up_analyzers)
+    yield
+    executor.shutdown(wait=False)
+    EXECUTOR = None
+    if PREDICT_POOL is not None:
+        PREDICT_POOL.shutdown(wait=False, cancel_futures=True)
+        PREDICT_POOL = None
+
 # 初始化FastAPI应用
 app = FastAPI(
     title="Prometheus Analytics Service",
     description="Python-powered data analytics microservice for hazard monitoring",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
+app.router.route_class = ORJSONRoute
 
 # CORS配置
 app.add_middleware(
@@ -50,8 +225,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩：分析结果、ETL处理数据等大JSON响应体积可缩小数倍
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # 数据模型定义
 class HazardData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     type: str = "unknown"
     title: str = "Unknown Event"
@@ -62,11 +242,64 @@ class HazardData(BaseModel):
     source: str = "DisasterAWARE"
     populationExposed: Optional[int] = None
 
-class AnalysisRequest(BaseModel):
+# 灾害数据字段（DataFrame列顺序）
+HAZARD_FIELDS = list(HazardData.model_fields)
+
+def hazard_dicts(hazards: List[HazardData]) -> List[Dict[str, Any]]:
+    """灾害数据的字段字典列表（只读视图）
+    
+    直接取模型实例的__dict__，不复制；实测比TypeAdapter(List[HazardData]).dump_python
+    快一个数量级以上（后者仍需为每条记录新建字典）。可信请求的hazards本身即为字典，原样返回。
+    模型为frozen，调用方不得修改返回的字典
+    """
+    return [hazard if isinstance(hazard, dict) else hazard.__dict__ for hazard in hazards]
+
+# 可信输入：服务端开启TRUSTED_INPUT=1后，请求体带"trusted": true的批量请求用model_construct
+# 直接构建模型，跳过逐条字段校验和类型转换。安全边界：只应在服务仅接收信任域内后端微服务
+# 调用时开启——跳过校验后，缺失或类型错误的字段会原样进入分析流程
+TRUSTED_INPUT_ENABLED = os.getenv("TRUSTED_INPUT") == "1"
+
+class HazardBatchRequest(BaseModel):
+    """携带灾害数据列表的请求基类"""
     hazards: List[HazardData]
+    # 调用方声明数据来自可信上游且已校验；服务端未开启TRUSTED_INPUT时忽略
+    trusted: bool = False
+    # 内容缓存键，按是否区分记录顺序分别记忆在请求对象上（见request_cache_key）
+    _cache_keys: Dict[bool, str] = PrivateAttr(default_factory=dict)
+    # 已构建的DataFrame，按是否做类型转换分别记忆（见request_df）
+    _frames: Dict[bool, pd.DataFrame] = PrivateAttr(default_factory=dict)
+    
+    @model_validator(mode='wrap')
+    @classmethod
+    def _construct_trusted(cls, data: Any, handler):
+        """可信请求跳过校验：model_construct构建请求，hazards直接保留解析得到的字典
+        
+        实测逐条HazardData.model_construct（Python层）比pydantic-core的完整校验还慢，
+        因此不再为每条数据建模型；下游只经hazard_dicts取字段字典，两种形式均可处理
+        """
+        if TRUSTED_INPUT_ENABLED and isinstance(data, dict) and data.get('trusted') is True:
+            return cls.model_construct(**{**data, 'hazards': list(data.get('hazards') or ())})
+        return handler(data)
+
+# 综合分析接口单次处理的最大记录数
+ANALYZE_MAX_HAZARDS = 1000
+
+class AnalysisRequest(HazardBatchRequest):
     analysisType: str = "comprehensive"
     timeRange: int = 30  # days
 
+class ComprehensiveAnalysisRequest(AnalysisRequest):
+    """综合分析请求：记录数超过ANALYZE_MAX_HAZARDS时截断"""
+    
+    @field_validator('hazards', mode='before')
+    @classmethod
+    def _limit_hazards(cls, hazards: Any) -> Any:
+        """超出上限的记录在校验前截断，不再为随后丢弃的记录逐条构建模型"""
+        if isinstance(hazards, list) and len(hazards) > ANALYZE_MAX_HAZARDS:
+            logger.warning(f"Large dataset detected: {len(hazards)} records, limiting to {ANALYZE_MAX_HAZARDS}")
+            return hazards[:ANALYZE_MAX_HAZARDS]
+        return hazards
+
 class AnalysisResponse(BaseModel):
     success: bool
     data: Dict[str, Any]
@@ -74,26 +307,82 @@ class AnalysisResponse(BaseModel):
     timestamp: str
 
 # 全局缓存配置
-GLOBAL_CACHE = {}
+# LRU缓存：键 -> (结果, 过期时间)，按最近使用顺序排列，命中和淘汰均为O(1)
+GLOBAL_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+CACHE_LOCK = asyncio.Lock()
 CACHE_TTL = 300  # 5分钟缓存
 CACHE_MAX_SIZE = 100
 
+# 4维透视表分析器缓存：内容键 -> 已预处理的分析器，五个透视接口共用；
+# 分析器只依赖数据内容，不设过期时间，按LRU淘汰
+ANALYZER_CACHE: "OrderedDict[str, FourDimensionalPivotTable]" = OrderedDict()
+ANALYZER_CACHE_MAX_SIZE = 16
+
 # 性能监控
 REQUEST_METRICS = {
     "total_requests": 0,
     "cache_hits": 0,
-    "cache_misses": 0,
-    "avg_processing_time": 0
+    "cache_misses": 0
 }
+# 最近请求的处理耗时（毫秒），平均值在/metrics中按需计算；
+# 只追加不做读-改-写，并发请求交错完成时也不会算错
+RECENT_PROCESSING_MS: "deque[float]" = deque(maxlen=1024)
+
+def get_cache_key(data: List[Dict], analysis_type: Optional[str] = None, time_range: Optional[int] = None,
+                  ordered: bool = False) -> str:
+    """生成请求数据的缓存键
+    
+    对完整数据的规范化字节（orjson输出的键排序紧凑JSON，直接得到bytes）做内容哈希，
+    不同数据不会共用缓存；analysisType和timeRange也参与计算。
+    ordered为False时各条记录单独编码后排序再拼接，记录顺序不同的等价请求得到相同的键
+    （只适用于结果与记录顺序无关的综合分析）；ordered为True时按输入顺序拼接——
+    ETL去重保留首条、输出按输入顺序排列，这类结果须使用区分顺序的键
+    """
+    records = [orjson.dumps(record, default=str, option=orjson.OPT_SORT_KEYS) for record in data]
+    if not ordered:
+        records.sort()
+    # 紧凑JSON中不含原始换行符，以换行分隔记录不会产生歧义
+    payload = orjson.dumps([analysis_type, time_range, len(records)]) + b'\n' + b'\n'.join(records)
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(payload)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def request_cache_key(request: HazardBatchRequest, ordered: bool = False) -> str:
+    """请求的内容缓存键，记忆在请求对象上，同一请求多处使用时只序列化、哈希一次
+    
+    ordered含义见get_cache_key；须在请求数据（如hazards截断）确定之后调用
+    """
+    cache_key = request._cache_keys.get(ordered)
+    if cache_key is None:
+        cache_key = request._cache_keys[ordered] = get_cache_key(
+            hazard_dicts(request.hazards),
+            getattr(request, 'analysisType', None),
+            getattr(request, 'timeRange', None),
+            ordered
+        )
+    return cache_key
+
+def request_etag(request: HazardBatchRequest) -> str:
+    """分析类响应的弱ETag：请求内容键 + 当前日期
+    
+    响应中含处理时间等字段，字节并不完全相同，因此使用弱ETag；
+    近7天等时间窗口统计随日期变化，日期参与计算；ETL等响应依赖记录顺序，使用区分顺序的键
+    """
+    return f'W/"{request_cache_key(request, ordered=True)}-{datetime.now():%Y%m%d}"'
 
-def get_cache_key(data: List[Dict]) -> str:
-    """生成请求数据的缓存键"""
-    if not data:
-        return "empty"
-    # 使用数据长度、类型分布和时间戳范围生成键
-    types = [d.get('type', 'unknown') for d in data[:10]]
-    key_str = f"{len(data)}_{sorted(types)}_{data[0].get('timestamp', '')}_{data[-1].get('timestamp', '')}"
-    return hashlib.md5(key_str.encode()).hexdigest()
+def etag_headers(etag: str) -> Dict[str, str]:
+    """ETag及客户端缓存时间（与服务端缓存TTL一致）"""
+    return {"ETag": etag, "Cache-Control": f"private, max-age={CACHE_TTL}"}
+
+def not_modified(http_request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match命中（弱比较）时返回304响应，否则返回None"""
+    header = http_request.headers.get("if-none-match")
+    if not header:
+        return None
+    opaque = etag.removeprefix("W/")
+    if header.strip() == "*" or any(tag.strip().removeprefix("W/") == opaque for tag in header.split(",")):
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
 
 def cache_response(ttl: int = CACHE_TTL):
     """缓存装饰器"""
@@ -105,34 +394,31 @@ def cache_response(ttl: int = CACHE_TTL):
             if not request or not hasattr(request, 'hazards'):
                 return await func(*args, **kwargs)
             
-            cache_key = get_cache_key([h.dict() for h in request.hazards])
+            cache_key = request_cache_key(request)
             
             # 检查缓存
-            if cache_key in GLOBAL_CACHE:
-                cache_entry = GLOBAL_CACHE[cache_key]
-                if (datetime.now() - cache_entry['timestamp']).seconds < ttl:
-                    REQUEST_METRICS["cache_hits"] += 1
-                    logger.info(f"Cache hit for {func.__name__}: {cache_key[:8]}...")
-                    return cache_entry['data']
-                else:
+            async with CACHE_LOCK:
+                cache_entry = GLOBAL_CACHE.get(cache_key)
+                if cache_entry is not None:
+                    result, expires_at = cache_entry
+                    if time.monotonic() < expires_at:
+                        GLOBAL_CACHE.move_to_end(cache_key)
+                        REQUEST_METRICS["cache_hits"] += 1
+                        logger.info(f"Cache hit for {func.__name__}: {cache_key[:8]}...")
+                        return result
                     # 缓存过期
                     del GLOBAL_CACHE[cache_key]
+                REQUEST_METRICS["cache_misses"] += 1
             
-            REQUEST_METRICS["cache_misses"] += 1
-            
-            # 执行函数
+            # 执行函数（不持有锁，避免串行化并发请求）
             result = await func(*args, **kwargs)
             
-            # 保存到缓存
-            if len(GLOBAL_CACHE) >= CACHE_MAX_SIZE:
-                # 删除最旧的条目
-                oldest_key = min(GLOBAL_CACHE, key=lambda k: GLOBAL_CACHE[k]['timestamp'])
-                del GLOBAL_CACHE[oldest_key]
-            
-            GLOBAL_CACHE[cache_key] = {
-                'data': result,
-                'timestamp': datetime.now()
-            }
+            # 保存到缓存，超出容量时淘汰最久未使用的条目
+            async with CACHE_LOCK:
+                GLOBAL_CACHE[cache_key] = (result, time.monotonic() + ttl)
+                GLOBAL_CACHE.move_to_end(cache_key)
+                if len(GLOBAL_CACHE) > CACHE_MAX_SIZE:
+                    GLOBAL_CACHE.popitem(last=False)
             
             return result
         return wrapper
@@ -144,19 +430,75 @@ prediction_engine = PredictionEngine()
 etl_processor = ETLProcessor()
 risk_assessor = RiskAssessor()
 
+def hazards_to_df(hazards: List[HazardData], convert_types: bool = True) -> pd.DataFrame:
+    """将请求中的灾害数据转换为DataFrame
+    
+    直接读取模型实例的字段字典并按固定列构建，跳过逐条.dict()生成中间字典；
+    （from_records在C层完成行转列，实测快于先在Python中转置为列表再逐列构建）
+    convert_types为True时由ETL处理器完成时间戳和数值列的类型转换
+    """
+    records = hazard_dicts(hazards)
+    if not convert_types:
+        return pd.DataFrame.from_records(records, columns=HAZARD_FIELDS)
+    return etl_processor.convert_to_dataframe(records, columns=HAZARD_FIELDS)
+
+async def run_blocking(func, *args, **kwargs) -> Any:
+    """在分析线程池中执行同步的pandas计算，不阻塞事件循环"""
+    if kwargs:
+        func = partial(func, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+
+def request_df(request: HazardBatchRequest, convert_types: bool = True) -> pd.DataFrame:
+    """请求对应的DataFrame，记忆在请求对象上，同一请求多处使用时只转换一次
+    
+    须在请求数据（如hazards截断）确定之后调用；调用方不应原地修改返回的DataFrame
+    """
+    df = request._frames.get(convert_types)
+    if df is None:
+        df = request._frames[convert_types] = hazards_to_df(request.hazards, convert_types)
+    return df
+
+def build_analyzer(request: AnalysisRequest) -> FourDimensionalPivotTable:
+    """构建请求数据的4维透视表分析器（同步，含DataFrame转换和预处理）"""
+    return FourDimensionalPivotTable(request_df(request, convert_types=False))
+
+async def get_analyzer(request: AnalysisRequest) -> FourDimensionalPivotTable:
+    """请求数据对应的4维透视表分析器，相同数据的透视请求复用同一实例
+    
+    分析器的查询方法不修改内部数据，可安全共用；缓存只在事件循环线程中读写，无需加锁，
+    未命中时在线程池中构建（并发的相同请求可能各构建一次，结果相同）
+    """
+    # 预处理后的数据保留输入顺序，使用区分记录顺序的键
+    cache_key = await run_blocking(request_cache_key, request, ordered=True)
+    analyzer = ANALYZER_CACHE.get(cache_key)
+    if analyzer is not None:
+        ANALYZER_CACHE.move_to_end(cache_key)
+        return analyzer
+    analyzer = ANALYZER_CACHE[cache_key] = await run_blocking(build_analyzer, request)
+    if len(ANALYZER_CACHE) > ANALYZER_CACHE_MAX_SIZE:
+        ANALYZER_CACHE.popitem(last=False)
+    return analyzer
+
+# 内容固定的响应体，启动时序列化一次，请求时直接返回字节
+ROOT_RESPONSE_BODY = dumps_json({
+    "service": "Prometheus Analytics Service", 
+    "status": "running",
+    "version": "1.0.0",
+    "features": [
+        "23 Statistical Algorithms",
+        "5 Prediction Models", 
+        "ETL Processing",
+        "Risk Assessment"
+    ]
+})
+QUALITY_THRESHOLDS_BODY = dumps_json({
+    "success": True,
+    "data": etl_processor.quality_monitor.QUALITY_THRESHOLDS
+})
+
 @app.get("/")
 async def root():
-    return {
-        "service": "Prometheus Analytics Service", 
-        "status": "running",
-        "version": "1.0.0",
-        "features": [
-            "23 Statistical Algorithms",
-            "5 Prediction Models", 
-            "ETL Processing",
-            "Risk Assessment"
-        ]
-    }
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/health")
 async def health_check():
@@ -167,6 +509,8 @@ async def get_metrics():
     """获取性能指标"""
     cache_hit_rate = (REQUEST_METRICS["cache_hits"] / 
                      max(1, REQUEST_METRICS["cache_hits"] + REQUEST_METRICS["cache_misses"])) * 100
+    recent = list(RECENT_PROCESSING_MS)
+    avg_processing_time = sum(recent) / len(recent) if recent else 0
     
     return {
         "totalRequests": REQUEST_METRICS["total_requests"],
@@ -174,54 +518,150 @@ async def get_metrics():
         "cacheMisses": REQUEST_METRICS["cache_misses"],
         "cacheHitRate": f"{cache_hit_rate:.1f}%",
         "cacheSize": len(GLOBAL_CACHE),
-        "avgProcessingTime": f"{REQUEST_METRICS['avg_processing_time']:.2f}ms",
+        "avgProcessingTime": f"{avg_processing_time:.2f}ms",
         "timestamp": datetime.now().isoformat()
     }
 
 @app.post("/cache/clear")
 async def clear_cache():
-    """清除缓存"""
-    GLOBAL_CACHE.clear()
+    """清除缓存（与缓存装饰器的读写共用同一把锁）"""
+    async with CACHE_LOCK:
+        GLOBAL_CACHE.clear()
+    ANALYZER_CACHE.clear()
     return {"success": True, "message": "Cache cleared"}
 
+# 进行中的综合分析：键为请求内容哈希，相同内容的并发请求共享同一次计算
+INFLIGHT_ANALYSES: Dict[str, asyncio.Future] = {}
+
+async def run_coalesced(key: str, compute) -> Any:
+    """合并相同内容的并发请求：首个请求发起计算，其余请求等待同一结果
+    
+    使用shield，单个客户端断开不会取消其他请求共享的计算
+    """
+    future = INFLIGHT_ANALYSES.get(key)
+    if future is None:
+        future = asyncio.ensure_future(compute())
+        INFLIGHT_ANALYSES[key] = future
+        future.add_done_callback(lambda _: INFLIGHT_ANALYSES.pop(key, None))
+    else:
+        logger.info(f"Joining in-flight analysis: {key[:8]}...")
+    return await asyncio.shield(future)
+
+async def run_predictions(df: pd.DataFrame, bundle: Optional[AnalyticsBundle] = None) -> Dict[str, Any]:
+    """生成预测：数据量足够时在预测进程池中执行，只传递预测所需的列"""
+    loop = asyncio.get_running_loop()
+    if PREDICT_POOL is None or len(df) < PREDICT_POOL_MIN_ROWS:
+        return await loop.run_in_executor(get_executor(), prediction_engine.generate_predictions, df, bundle)
+    columns = [col for col in PREDICT_COLUMNS if col in df.columns]
+    return await loop.run_in_executor(PREDICT_POOL, predict_in_worker, df[columns], bundle)
+
+# 小请求阈值：低于该条数时三个分析直接在当前协程中顺序执行
+SMALL_REQUEST_ROWS = 10
+
+def run_core_analyses_inline(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """小请求的快速路径：计算量只有毫秒级，省去线程池调度、gather和请求合并的开销"""
+    bundle = AnalyticsBundle.from_frame(df)
+    return [
+        statistical_analyzer.run_comprehensive_analysis(df, bundle),
+        prediction_engine.generate_predictions(df, bundle),
+        risk_assessor.calculate_comprehensive_risk(df, bundle)
+    ]
+
+def warm_up_analyzers() -> None:
+    """用少量样例数据跑一遍各分析路径（启动时调用）
+    
+    首次调用时的模块延迟导入、pandas/scipy/sklearn的首次分派等一次性开销在启动阶段完成，
+    服务启动后的第一个请求不再明显变慢；预热失败只记录警告，不影响启动
+    """
+    start_ns = time.perf_counter_ns()
+    hazard_types = ['earthquake', 'flood', 'wildfire', 'hurricane']
+    severities = ['WARNING', 'WATCH', 'ADVISORY', None]
+    hazards = [
+        HazardData(
+            id=f"warmup-{i}",
+            type=hazard_types[i % 4],
+            coordinates=[-170.0 + 15 * i, -60.0 + 5 * i],
+            timestamp=(datetime.now() - timedelta(days=i // 2, hours=i)).isoformat(),
+            magnitude=3.0 + (i % 10) / 2,
+            severity=severities[i % 4],
+            source="USGS"
+        )
+        # 超过统计分析的完整分析行数门槛，覆盖各子分析路径
+        for i in range(24)
+    ]
+    try:
+        df = hazards_to_df(hazards)
+        run_core_analyses_inline(df)
+        etl_processor.process_data(df)
+        analyzer = FourDimensionalPivotTable(hazards_to_df(hazards, convert_types=False))
+        analyzer.create_4d_pivot()
+        analyzer.trend_analysis_4d()
+        analyzer.risk_score_4d()
+        analyzer.get_summary_statistics()
+        logger.info(f"Analyzer warm-up finished in {(time.perf_counter_ns() - start_ns) / 1e6:.1f}ms")
+    except Exception as e:
+        logger.warning(f"Analyzer warm-up failed: {e}")
+
+async def run_core_analyses(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """并行执行统计、预测、风险三个分析任务（统计、风险在线程池，预测见run_predictions）
+    
+    共享列数组只构建一次，三个分析器直接复用，不再各自解析时间戳、拆分坐标
+    """
+    loop = asyncio.get_running_loop()
+    bundle = AnalyticsBundle.from_frame(df)
+    return await asyncio.gather(
+        loop.run_in_executor(get_executor(), statistical_analyzer.run_comprehensive_analysis, df, bundle),
+        run_predictions(df, bundle),
+        loop.run_in_executor(get_executor(), risk_assessor.calculate_comprehensive_risk, df, bundle)
+    )
+
 @app.post("/api/v1/analyze", response_model=AnalysisResponse)
-async def comprehensive_analysis(request: AnalysisRequest):
+async def comprehensive_analysis(request: ComprehensiveAnalysisRequest, http_request: Request, response: Response):
     """综合数据分析接口 - 替代TypeScript的23种统计算法
     
     优化：
     - 并行处理三个分析任务
+    - 合并内容相同的并发请求
+    - 小请求快速路径
     - 批量数据验证
     - 性能监控
+    - ETag条件请求（内容未变时返回304）
     """
-    start_time = datetime.now()
+    start_ns = time.perf_counter_ns()
     REQUEST_METRICS["total_requests"] += 1
     
     try:
-        # 数据验证和限制
-        if len(request.hazards) > 1000:
-            logger.warning(f"Large dataset detected: {len(request.hazards)} records, limiting to 1000")
-            request.hazards = request.hazards[:1000]
+        # 数据限制：通常已在校验前截断（见AnalysisRequest），可信请求跳过校验，在此截断
+        if len(request.hazards) > ANALYZE_MAX_HAZARDS:
+            logger.warning(f"Large dataset detected: {len(request.hazards)} records, limiting to {ANALYZE_MAX_HAZARDS}")
+            request.hazards = request.hazards[:ANALYZE_MAX_HAZARDS]
         
-        # 转换数据格式
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
+        # 内容哈希、DataFrame转换和数据质量评估均为同步计算，在线程池中执行，不阻塞事件循环
+        etag = await run_blocking(request_etag, request)
+        cached = not_modified(http_request, etag)
+        if cached is not None:
+            return cached
+        response.headers.update(etag_headers(etag))
         
-        # 并行执行三个分析任务（使用asyncio）
-        loop = asyncio.get_event_loop()
-        statistical_task = loop.run_in_executor(None, statistical_analyzer.run_comprehensive_analysis, df)
-        prediction_task = loop.run_in_executor(None, prediction_engine.generate_predictions, df)
-        risk_task = loop.run_in_executor(None, risk_assessor.calculate_comprehensive_risk, df)
+        # 转换数据格式
+        df = await run_blocking(request_df, request)
         
-        # 等待所有任务完成
-        statistical_results, prediction_results, risk_results = await asyncio.gather(
-            statistical_task, prediction_task, risk_task
-        )
+        # 并行执行三个分析任务；内容相同的并发请求合并为一次计算（小请求直接顺序执行）
+        if len(df) < SMALL_REQUEST_ROWS:
+            statistical_results, prediction_results, risk_results = run_core_analyses_inline(df)
+        else:
+            coalesce_key = await run_blocking(request_cache_key, request)
+            statistical_results, prediction_results, risk_results = await run_coalesced(
+                coalesce_key, lambda: run_core_analyses(df)
+            )
+        data_quality = await run_blocking(etl_processor.assess_data_quality, df)
         
         # 组合结果
         analysis_data = {
             "statistics": statistical_results,
             "predictions": prediction_results,
             "riskAssessment": risk_results,
-            "dataQuality": etl_processor.assess_data_quality(df),
+            "dataQuality": data_quality,
             "processingInfo": {
                 "totalRecords": len(df),
                 "timeRange": request.timeRange,
@@ -229,14 +669,11 @@ async def comprehensive_analysis(request: AnalysisRequest):
             }
         }
         
-        processing_time = (datetime.now() - start_time).total_seconds()
-        processing_time_ms = processing_time * 1000
+        processing_time_ms = (time.perf_counter_ns() - start_ns) / 1e6
+        processing_time = processing_time_ms / 1000
         
-        # 更新平均处理时间
-        REQUEST_METRICS["avg_processing_time"] = (
-            (REQUEST_METRICS["avg_processing_time"] * (REQUEST_METRICS["total_requests"] - 1) + 
-             processing_time_ms) / REQUEST_METRICS["total_requests"]
-        )
+        # 记录处理时间
+        RECENT_PROCESSING_MS.append(processing_time_ms)
         
         # 添加性能指标到响应
         analysis_data["performance"] = {
@@ -261,9 +698,9 @@ async def comprehensive_analysis(request: AnalysisRequest):
 async def statistical_analysis(request: AnalysisRequest):
     """专门的统计分析接口 - 23种算法"""
     try:
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
-        results = statistical_analyzer.run_comprehensive_analysis(df)
-        return {"success": True, "data": results}
+        df = await run_blocking(request_df, request)
+        results = await run_blocking(statistical_analyzer.run_comprehensive_analysis, df)
+        return FastJSONResponse({"success": True, "data": results})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -271,31 +708,36 @@ async def statistical_analysis(request: AnalysisRequest):
 async def prediction_analysis(request: AnalysisRequest):
     """专门的预测分析接口 - 5个回归模型"""
     try:
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
-        results = prediction_engine.generate_predictions(df)
-        return {"success": True, "data": results}
+        df = await run_blocking(request_df, request)
+        results = await run_predictions(df)
+        return FastJSONResponse({"success": True, "data": results})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/v1/etl/process")
-async def etl_processing(request: AnalysisRequest):
+async def etl_processing(request: AnalysisRequest, http_request: Request):
     """ETL数据处理接口"""
     try:
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
-        processed_data = etl_processor.process_data(df)
-        quality_metrics = etl_processor.assess_data_quality(processed_data)
+        # 内容哈希为同步计算，在线程池中执行，不阻塞事件循环
+        etag = await run_blocking(request_etag, request)
+        cached = not_modified(http_request, etag)
+        if cached is not None:
+            return cached
         
-        # 将NaN替换为None以便JSON序列化
-        processed_data_clean = processed_data.replace({np.nan: None})
+        def process() -> tuple:
+            processed = etl_processor.process_data(request_df(request))
+            return processed, etl_processor.assess_data_quality(processed)
         
-        return {
-            "success": True, 
-            "data": {
-                "processedData": processed_data_clean.to_dict('records'),
-                "qualityMetrics": quality_metrics,
-                "recordsProcessed": len(processed_data)
-            }
-        }
+        processed_data, quality_metrics = await run_blocking(process)
+        
+        # 处理结果按批流式输出，质量指标等尾部字段先序列化好，流开始后不会再失败
+        tail = (b',"qualityMetrics":' + dumps_json(quality_metrics)
+                + b',"recordsProcessed":' + dumps_json(len(processed_data)) + b'}}')
+        return StreamingResponse(
+            stream_records(b'{"success":true,"data":{"processedData":', processed_data, tail),
+            media_type="application/json",
+            headers=etag_headers(etag)
+        )
     except Exception as e:
         logger.error(f"ETL processing error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -304,9 +746,9 @@ async def etl_processing(request: AnalysisRequest):
 async def risk_assessment(request: AnalysisRequest):
     """风险评估接口"""
     try:
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
-        risk_results = risk_assessor.calculate_comprehensive_risk(df)
-        return {"success": True, "data": risk_results}
+        df = await run_blocking(request_df, request)
+        risk_results = await run_blocking(risk_assessor.calculate_comprehensive_risk, df)
+        return FastJSONResponse({"success": True, "data": risk_results})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -318,9 +760,8 @@ class UnifiedDataRequest(BaseModel):
     nasa_data: Optional[List[Dict]] = None
     gdacs_data: Optional[List[Dict]] = None
 
-class QualityCheckRequest(BaseModel):
+class QualityCheckRequest(HazardBatchRequest):
     """质量检查请求"""
-    hazards: List[HazardData]
     source: str = "unknown"
 
 @app.post("/api/v1/quality/assess")
@@ -336,13 +777,13 @@ async def assess_data_quality(request: QualityCheckRequest):
     - 有效性 (Validity)
     """
     try:
-        df = etl_processor.convert_to_dataframe([hazard.dict() for hazard in request.hazards])
-        quality_report = etl_processor.assess_data_quality(df, request.source)
+        df = await run_blocking(request_df, request)
+        quality_report = await run_blocking(etl_processor.assess_data_quality, df, request.source)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": quality_report
-        }
+        })
     except Exception as e:
         logger.error(f"Quality assessment error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -356,21 +797,19 @@ async def transform_to_unified_model(request: QualityCheckRequest):
     返回标准化的DataFrame Schema
     """
     try:
-        hazards_data = [hazard.dict() for hazard in request.hazards]
-        unified_df = etl_processor.transform_to_unified_model(hazards_data, request.source)
-        
-        # 转换为JSON可序列化格式
-        unified_df_clean = unified_df.replace({np.nan: None})
+        hazards_data = hazard_dicts(request.hazards)
+        unified_df = await run_blocking(etl_processor.transform_to_unified_model, hazards_data, request.source)
+        records = await run_blocking(df_records, unified_df)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
-                "records": unified_df_clean.to_dict('records'),
+                "records": records,
                 "total_records": len(unified_df),
-                "schema": list(unified_df.columns),
+                "schema": unified_df.columns.tolist(),
                 "source": request.source
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Unified model transformation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -387,27 +826,28 @@ async def merge_multi_source(request: UnifiedDataRequest):
     - 数据源质量对比
     """
     try:
-        result = etl_processor.merge_multi_source_data(
-            usgs_data=request.usgs_data,
-            nasa_data=request.nasa_data,
-            gdacs_data=request.gdacs_data
+        # 各数据源的转换和质量评估互不依赖，在线程池中并发执行，最后统一合并
+        sources = {'USGS': request.usgs_data, 'NASA': request.nasa_data, 'GDACS': request.gdacs_data}
+        present = [source for source, data in sources.items() if data]
+        transformed = await asyncio.gather(
+            *(run_blocking(etl_processor.transform_source, sources[source], source) for source in present)
         )
+        result = await run_blocking(etl_processor.merge_transformed_sources, dict(zip(present, transformed)))
         
-        # 转换DataFrame为JSON可序列化格式
         unified_df = result['unified_data']
-        unified_df_clean = unified_df.replace({np.nan: None})
+        unified_records = await run_blocking(df_records, unified_df)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
-                "unified_records": unified_df_clean.to_dict('records'),
+                "unified_records": unified_records,
                 "total_records": result['total_records'],
                 "source_records": result['source_records'],
                 "merged_quality": result['merged_quality'],
                 "source_quality_reports": result['source_quality_reports'],
                 "source_comparison": result['source_comparison']
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Multi-source merge error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -415,23 +855,20 @@ async def merge_multi_source(request: UnifiedDataRequest):
 @app.get("/api/v1/quality/thresholds")
 async def get_quality_thresholds():
     """获取质量监控阈值配置"""
-    return {
-        "success": True,
-        "data": etl_processor.quality_monitor.QUALITY_THRESHOLDS
-    }
+    return Response(content=QUALITY_THRESHOLDS_BODY, media_type="application/json")
 
 @app.get("/api/v1/quality/history")
 async def get_quality_history(limit: int = 10):
     """获取质量评估历史记录"""
     try:
         history = etl_processor.quality_monitor.get_quality_trend(limit)
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "history": history,
                 "count": len(history)
             }
-        }
+        })
     except Exception as e:
         logger.error(f"Quality history error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -450,14 +887,13 @@ async def create_4d_pivot_table(request: AnalysisRequest):
         - aggfunc: 聚合函数 (count/sum/mean)
     """
     try:
-        start_time = asyncio.get_event_loop().time()
-        df = pd.DataFrame([h.dict() for h in request.hazards])
-        
-        # 创建4维透视表分析器
-        analyzer = FourDimensionalPivotTable(df)
+        start_ns = time.perf_counter_ns()
+        # 获取4维透视表分析器（相同数据复用已预处理的实例）
+        analyzer = await get_analyzer(request)
         
         # 构建透视表
-        pivot_table = analyzer.create_4d_pivot(
+        pivot_table = await run_blocking(
+            analyzer.create_4d_pivot,
             time_dim=request.time_dim if hasattr(request, 'time_dim') else 'month',
             geo_dim=request.geo_dim if hasattr(request, 'geo_dim') else 'region',
             type_dim='type_category',
@@ -466,16 +902,16 @@ async def create_4d_pivot_table(request: AnalysisRequest):
         )
         
         # 获取汇总统计
-        summary = analyzer.get_summary_statistics()
+        summary = await run_blocking(analyzer.get_summary_statistics)
         
         # 导出为字典格式
-        pivot_dict = analyzer.export_pivot_to_dict(pivot_table)
+        pivot_dict = await run_blocking(analyzer.export_pivot_to_dict, pivot_table)
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
         logger.info(f"4维透视表创建成功，处理时间: {processing_time:.3f}s")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
                 "pivot_table": pivot_dict,
@@ -487,7 +923,7 @@ async def create_4d_pivot_table(request: AnalysisRequest):
             },
             "processingTime": processing_time,
             "timestamp": datetime.now().isoformat()
-        }
+        })
     except Exception as e:
         logger.error(f"4D pivot creation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -504,10 +940,8 @@ async def multi_dimensional_query(request: AnalysisRequest):
         - severities: 严重性级别列表
     """
     try:
-        start_time = asyncio.get_event_loop().time()
-        df = pd.DataFrame([h.dict() for h in request.hazards])
-        
-        analyzer = FourDimensionalPivotTable(df)
+        start_ns = time.perf_counter_ns()
+        analyzer = await get_analyzer(request)
         
         # 解析查询参数
         time_range = None
@@ -522,30 +956,31 @@ async def multi_dimensional_query(request: AnalysisRequest):
         severities = getattr(request, 'severities', None)
         
         # 执行多维度查询
-        result_df = analyzer.multi_dimensional_query(
+        result_df = await run_blocking(
+            analyzer.multi_dimensional_query,
             time_range=time_range,
             regions=regions,
             types=types,
             severities=severities
         )
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
-        return {
-            "success": True,
-            "data": {
-                "results": result_df.to_dict('records'),
-                "total_count": len(result_df),
-                "query_params": {
-                    "time_range": request.time_range if hasattr(request, 'time_range') else None,
-                    "regions": regions,
-                    "types": types,
-                    "severities": severities
-                }
-            },
-            "processingTime": processing_time,
-            "timestamp": datetime.now().isoformat()
+        # 查询结果按批流式输出，其余字段先序列化为尾部，流开始后不会再失败
+        query_params = {
+            "time_range": request.time_range if hasattr(request, 'time_range') else None,
+            "regions": regions,
+            "types": types,
+            "severities": severities
         }
+        tail = (b',"total_count":' + dumps_json(len(result_df))
+                + b',"query_params":' + dumps_json(query_params)
+                + b'},"processingTime":' + dumps_json(processing_time)
+                + b',"timestamp":' + dumps_json(datetime.now().isoformat()) + b'}')
+        return StreamingResponse(
+            stream_records(b'{"success":true,"data":{"results":', result_df, tail),
+            media_type="application/json"
+        )
     except Exception as e:
         logger.error(f"Multi-dimensional query error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -558,26 +993,24 @@ async def analyze_4d_trends(request: AnalysisRequest):
         - time_window: 时间窗口（天数，默认7天）
     """
     try:
-        start_time = asyncio.get_event_loop().time()
-        df = pd.DataFrame([h.dict() for h in request.hazards])
-        
-        analyzer = FourDimensionalPivotTable(df)
+        start_ns = time.perf_counter_ns()
+        analyzer = await get_analyzer(request)
         
         time_window = getattr(request, 'time_window', 7)
         
         # 执行趋势分析
-        trend_df = analyzer.trend_analysis_4d(time_window=time_window)
+        trend_df = await run_blocking(analyzer.trend_analysis_4d, time_window=time_window)
         
         if trend_df.empty:
-            return {
+            return FastJSONResponse({
                 "success": True,
                 "data": {
                     "trends": [],
                     "message": "时间窗口内数据不足"
                 },
-                "processingTime": asyncio.get_event_loop().time() - start_time,
+                "processingTime": (time.perf_counter_ns() - start_ns) / 1e9,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
         
         # 提取上升趋势的高危组合
         high_risk_trends = trend_df[
@@ -585,13 +1018,13 @@ async def analyze_4d_trends(request: AnalysisRequest):
             (trend_df['severity'] == 'WARNING')
         ].sort_values('trend_slope', ascending=False)
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
-                "all_trends": trend_df.to_dict('records'),
-                "high_risk_trends": high_risk_trends.to_dict('records'),
+                "all_trends": df_records(trend_df),
+                "high_risk_trends": df_records(high_risk_trends),
                 "statistics": {
                     "total_combinations": len(trend_df),
                     "increasing": len(trend_df[trend_df['trend_direction'] == 'increasing']),
@@ -603,7 +1036,7 @@ async def analyze_4d_trends(request: AnalysisRequest):
             },
             "processingTime": processing_time,
             "timestamp": datetime.now().isoformat()
-        }
+        })
     except Exception as e:
         logger.error(f"4D trend analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -616,37 +1049,35 @@ async def calculate_4d_risk_scores(request: AnalysisRequest):
         - time_window: 时间窗口（天数，默认7天）
     """
     try:
-        start_time = asyncio.get_event_loop().time()
-        df = pd.DataFrame([h.dict() for h in request.hazards])
-        
-        analyzer = FourDimensionalPivotTable(df)
+        start_ns = time.perf_counter_ns()
+        analyzer = await get_analyzer(request)
         
         time_window = getattr(request, 'time_window', 7)
         
         # 计算风险评分
-        risk_df = analyzer.risk_score_4d(time_window=time_window)
+        risk_df = await run_blocking(analyzer.risk_score_4d, time_window=time_window)
         
         if risk_df.empty:
-            return {
+            return FastJSONResponse({
                 "success": True,
                 "data": {
                     "risk_scores": [],
                     "message": "时间窗口内数据不足"
                 },
-                "processingTime": asyncio.get_event_loop().time() - start_time,
+                "processingTime": (time.perf_counter_ns() - start_ns) / 1e9,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
         
         # Top 10 高风险区域
         top_risks = risk_df.head(10)
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": {
-                "all_risk_scores": risk_df.to_dict('records'),
-                "top_10_risks": top_risks.to_dict('records'),
+                "all_risk_scores": df_records(risk_df),
+                "top_10_risks": df_records(top_risks),
                 "statistics": {
                     "total_combinations": len(risk_df),
                     "max_risk_score": float(risk_df['risk_score'].max()),
@@ -657,7 +1088,7 @@ async def calculate_4d_risk_scores(request: AnalysisRequest):
             },
             "processingTime": processing_time,
             "timestamp": datetime.now().isoformat()
-        }
+        })
     except Exception as e:
         logger.error(f"4D risk scoring error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -666,20 +1097,18 @@ async def calculate_4d_risk_scores(request: AnalysisRequest):
 async def get_4d_summary(request: AnalysisRequest):
     """获取4维数据的汇总统计信息"""
     try:
-        start_time = asyncio.get_event_loop().time()
-        df = pd.DataFrame([h.dict() for h in request.hazards])
-        
-        analyzer = FourDimensionalPivotTable(df)
-        summary = analyzer.get_summary_statistics()
+        start_ns = time.perf_counter_ns()
+        analyzer = await get_analyzer(request)
+        summary = await run_blocking(analyzer.get_summary_statistics)
         
-        processing_time = asyncio.get_event_loop().time() - start_time
+        processing_time = (time.perf_counter_ns() - start_ns) / 1e9
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": summary,
             "processingTime": processing_time,
             "timestamp": datetime.now().isoformat()
-        }
+        })
     except Exception as e:
         logger.error(f"4D summary error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -688,10 +1117,21 @@ async def get_4d_summary(request: AnalysisRequest):
 
 if __name__ == "__main__":
     import uvicorn
+    # 生产环境使用uvloop事件循环和httptools解析器；仅在DEV=1时启用热重载（单进程）
+    dev_mode = os.getenv("DEV") == "1"
+    # 默认单进程：响应缓存、分析器缓存、请求合并、性能指标和质量历史都保存在进程内存中，
+    # 多个worker各有一份，/cache/clear只清空其中一个、指标和历史随响应的worker变化。
+    # 设置WORKERS显式启用多进程
+    workers = 1 if dev_mode else max(1, int(os.getenv("WORKERS", 1)))
+    # worker进程通过环境变量得知服务进程数，据此划分各自的线程池、进程池容量
+    os.environ["WORKERS"] = str(workers)
     uvicorn.run(
         "main:app", 
         host="0.0.0.0", 
         port=8001, 
-        reload=True,
+        loop="uvloop",
+        http="httptools",
+        reload=dev_mode,
+        workers=workers,
         log_level="info"
     )
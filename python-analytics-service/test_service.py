@@ -5,44 +5,80 @@
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from datetime import datetime, timedelta
-import random
+import orjson
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
 
 # API基础URL
 BASE_URL = "http://localhost:8001"
 
+# 所有测试共用的HTTP会话：复用keep-alive连接，只在首次请求时建立TCP连接
+# （连接池默认可容纳10个连接，足够并发执行的各测试同时使用）
+SESSION = requests.Session()
+# 服务端出错（如500）后可能关闭复用中的连接，下一个请求会遇到连接重置；
+# 连接/读取错误时对任意方法重试一次（测试请求均可重复发送），HTTP错误状态码不重试
+SESSION.mount("http://", HTTPAdapter(max_retries=Retry(total=1, allowed_methods=None)))
+
+def post_json(path, payload):
+    """以orjson序列化请求体后POST
+    
+    大批量hazards时，orjson（C扩展）直接生成bytes，比requests内部用标准库json逐条编码快数倍；
+    NumPy标量和数组在C层直接序列化
+    """
+    return SESSION.post(f"{BASE_URL}{path}", data=orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                        headers={"Content-Type": "application/json"})
+
 def generate_test_data(count=100):
-    """生成测试数据"""
+    """生成测试数据
+    
+    各字段按列一次性生成NumPy数组，记录中直接引用数组元素（坐标为二维数组的行），
+    不逐条调用round；请求体由post_json以orjson的NumPy支持直接序列化
+    """
     types = ['EARTHQUAKE', 'VOLCANO', 'STORM', 'FLOOD', 'WILDFIRE']
     severities = ['HIGH', 'MODERATE', 'LOW']
     
-    hazards = []
     base_time = datetime.now()
+    # 每次调用使用独立的Generator，并发执行的测试之间不共享随机数状态
+    rng = np.random.default_rng()
+    
+    # 经度、纬度范围分别为[-180, 180)、[-90, 90)
+    coordinates = rng.uniform([-180, -90], [180, 90], (count, 2)).round(4)
+    magnitudes = rng.uniform(4.0, 8.0, count).round(1)
+    hazard_types = rng.choice(types, count)
+    hazard_severities = rng.choice(severities, count)
+    # 时间戳：基准时间减去随机天数，一次性格式化为ISO字符串（精确到微秒，与isoformat相同）
+    days_ago = rng.integers(0, 31, count)
+    timestamps = np.datetime_as_string(
+        np.datetime64(base_time, 'us') - days_ago.astype('timedelta64[D]'), unit='us'
+    ).tolist()
+    populations = rng.integers(1000, 100001, count)
     
-    for i in range(count):
-        hazard = {
+    return [
+        {
             "id": f"test-{i}",
-            "type": random.choice(types),
+            "type": hazard_types[i],
             "title": f"Test Hazard {i}",
-            "coordinates": [
-                round(random.uniform(-180, 180), 4),
-                round(random.uniform(-90, 90), 4)
-            ],
-            "timestamp": (base_time - timedelta(days=random.randint(0, 30))).isoformat(),
-            "magnitude": round(random.uniform(4.0, 8.0), 1),
-            "severity": random.choice(severities),
+            "coordinates": coordinates[i],
+            "timestamp": timestamps[i],
+            "magnitude": magnitudes[i],
+            "severity": hazard_severities[i],
             "source": "TEST",
-            "populationExposed": random.randint(1000, 100000)
+            "populationExposed": populations[i]
         }
-        hazards.append(hazard)
-    
-    return hazards
+        for i in range(count)
+    ]
 
 def test_health_check():
     """测试健康检查"""
     print("\n=== Testing Health Check ===")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     print(f"Status: {response.status_code}")
     print(f"Response: {response.json()}")
     return response.status_code == 200
@@ -59,11 +95,7 @@ def test_comprehensive_analysis():
         "timeRange": 30
     }
     
-    response = requests.post(
-        f"{BASE_URL}/api/v1/analyze",
-        json=payload,
-        headers={"Content-Type": "application/json"}
-    )
+    response = post_json("/api/v1/analyze", payload)
     
     print(f"Status: {response.status_code}")
     
@@ -97,10 +129,7 @@ def test_statistical_analysis():
         "analysisType": "statistical"
     }
     
-    response = requests.post(
-        f"{BASE_URL}/api/v1/statistics",
-        json=payload
-    )
+    response = post_json("/api/v1/statistics", payload)
     
     print(f"Status: {response.status_code}")
     if response.status_code == 200:
@@ -119,10 +148,7 @@ def test_prediction_analysis():
         "hazards": test_data
     }
     
-    response = requests.post(
-        f"{BASE_URL}/api/v1/predictions",
-        json=payload
-    )
+    response = post_json("/api/v1/predictions", payload)
     
     print(f"Status: {response.status_code}")
     if response.status_code == 200:
@@ -149,10 +175,7 @@ def test_risk_assessment():
         "hazards": test_data
     }
     
-    response = requests.post(
-        f"{BASE_URL}/api/v1/risk-assessment",
-        json=payload
-    )
+    response = post_json("/api/v1/risk-assessment", payload)
     
     print(f"Status: {response.status_code}")
     if response.status_code == 200:
@@ -167,8 +190,95 @@ def test_risk_assessment():
         return True
     return False
 
+def test_etl_etag_reordered_duplicates():
+    """测试ETL的ETag区分记录顺序：同id记录去重保留首条，调换顺序后不能返回304"""
+    print("\n=== Testing ETL ETag With Reordered Duplicates ===")
+    
+    timestamp = datetime.now().isoformat()
+    first = {"id": "dup-1", "type": "EARTHQUAKE", "timestamp": timestamp, "magnitude": 3.0}
+    second = {"id": "dup-1", "type": "FLOOD", "timestamp": timestamp, "magnitude": 7.0}
+    
+    response = post_json("/api/v1/etl/process", {"hazards": [first, second]})
+    print(f"Status: {response.status_code}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert [row["magnitude"] for row in response.json()["data"]["processedData"]] == [3.0]
+    
+    # 内容相同的请求命中ETag
+    cached = SESSION.post(f"{BASE_URL}/api/v1/etl/process", data=orjson.dumps({"hazards": [first, second]}),
+                          headers={"Content-Type": "application/json", "If-None-Match": etag})
+    print(f"Same payload: {cached.status_code}")
+    assert cached.status_code == 304
+    
+    # 调换顺序后保留的是另一条记录，须返回新结果
+    reordered = SESSION.post(f"{BASE_URL}/api/v1/etl/process", data=orjson.dumps({"hazards": [second, first]}),
+                             headers={"Content-Type": "application/json", "If-None-Match": etag})
+    print(f"Reordered payload: {reordered.status_code}")
+    assert reordered.status_code == 200
+    assert reordered.headers["ETag"] != etag
+    assert [row["magnitude"] for row in reordered.json()["data"]["processedData"]] == [7.0]
+    return True
+
+def test_statistics_cache_distinct_content():
+    """测试统计分析缓存按内容区分：行数、类型分布相同而震级不同的数据不能返回旧结果"""
+    print("\n=== Testing Statistics Cache With Same-Shape Data ===")
+    
+    def batch(base_magnitude):
+        return {"hazards": [
+            {"id": f"same-shape-{i}", "type": "EARTHQUAKE", "timestamp": f"2026-01-{1 + i % 9:02d}T00:00:00",
+             "magnitude": base_magnitude + i / 20, "coordinates": [10.0, 10.0]}
+            for i in range(20)
+        ]}
+    
+    means = []
+    for base_magnitude in (2.0, 7.0):
+        response = post_json("/api/v1/statistics", batch(base_magnitude))
+        print(f"Status: {response.status_code}")
+        assert response.status_code == 200
+        means.append(response.json()["data"]["descriptiveStatistics"]["basicStats"]["mean"]["magnitude"])
+    print(f"Magnitude means: {means}")
+    assert means == [2.475, 7.475]
+    return True
+
+class ThreadBufferedOutput(io.TextIOBase):
+    """按线程分流的stdout：设置了缓冲区的线程写入各自的缓冲区，其余线程照常输出
+    
+    并发执行的测试各自缓冲输出，结束后按测试顺序整体打印，输出不会交错
+    """
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def set_buffer(self, buffer):
+        self._local.buffer = buffer
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+
+def run_test(test, output):
+    """执行单个测试并缓冲其输出，返回(测试名, 是否通过, 输出文本)"""
+    test_name, test_func = test
+    buffer = io.StringIO()
+    output.set_buffer(buffer)
+    try:
+        success = test_func()
+    except Exception as e:
+        print(f"\n❌ Test failed: {e}")
+        success = False
+    finally:
+        output.set_buffer(None)
+    return test_name, success, buffer.getvalue()
+
 def main():
-    """运行所有测试"""
+    """运行所有测试
+    
+    各测试只是等待服务端响应的HTTP请求，互不依赖，在线程池中并发执行，
+    总耗时接近最慢的单个测试而不是各测试之和
+    """
     print("=" * 60)
     print("Python Analytics Service - Test Suite")
     print("=" * 60)
@@ -178,17 +288,23 @@ def main():
         ("Comprehensive Analysis", test_comprehensive_analysis),
         ("Statistical Analysis", test_statistical_analysis),
         ("Prediction Analysis", test_prediction_analysis),
-        ("Risk Assessment", test_risk_assessment)
+        ("Risk Assessment", test_risk_assessment),
+        ("ETL ETag Reordered Duplicates", test_etl_etag_reordered_duplicates),
+        ("Statistics Cache Same-Shape Data", test_statistics_cache_distinct_content)
     ]
     
+    output = ThreadBufferedOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            outcomes = list(executor.map(lambda test: run_test(test, output), tests))
+    finally:
+        sys.stdout = output._stream
+    
     results = []
-    for test_name, test_func in tests:
-        try:
-            success = test_func()
-            results.append((test_name, success))
-        except Exception as e:
-            print(f"\n❌ Test failed: {e}")
-            results.append((test_name, False))
+    for test_name, success, test_output in outcomes:
+        sys.stdout.write(test_output)
+        results.append((test_name, success))
     
     # 打印测试总结
     print("\n" + "=" * 60)